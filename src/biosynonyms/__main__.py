@@ -1,6 +1,6 @@
 """Biosynonyms CLI."""
 
-from .resources import REPOSITORY
+from .cli import main
 
 if __name__ == "__main__":
-    REPOSITORY.cli()
+    main()
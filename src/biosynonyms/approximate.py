@@ -0,0 +1,231 @@
+"""A typo-tolerant approximate synonym index.
+
+This implements the symmetric delete algorithm: every synonym is indexed under
+all strings reachable by deleting up to ``max_distance`` characters, so a query
+only needs to generate its own deletions and look them up in a dictionary to
+find candidates. Candidates are then verified with a bounded Levenshtein
+distance. This is much faster than running a full grounder over millions of
+ungrounded strings, at the cost of only matching on surface forms.
+
+.. code-block:: python
+
+    from biosynonyms.approximate import ApproximateIndex
+
+    index = ApproximateIndex.default()
+    for scored in index.search("YAL02C"):
+        print(scored.literal_mapping.curie, scored.score)
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import NamedTuple
+
+from ssslm import LiteralMapping
+
+from .workers import call_in_worker, get_process_pool
+
+__all__ = [
+    "ApproximateIndex",
+    "ScoredLiteralMapping",
+    "normalize_key",
+]
+
+
+class ScoredLiteralMapping(NamedTuple):
+    """A literal mapping matched by approximate search."""
+
+    literal_mapping: LiteralMapping
+    distance: int
+    score: float
+
+
+def normalize_key(text: str) -> str:
+    """Normalize text for approximate matching by casefolding and collapsing whitespace."""
+    return " ".join(text.casefold().split())
+
+
+class ApproximateIndex:
+    """An index for looking up literal mappings within a bounded edit distance."""
+
+    def __init__(self, literal_mappings: Iterable[LiteralMapping], *, max_distance: int = 2):
+        """Build the index.
+
+        :param literal_mappings: The literal mappings to index, e.g., from
+            :func:`biosynonyms.get_positive_synonyms`
+        :param max_distance: The maximum edit distance supported by queries. Memory
+            grows quickly with this, so keep it small.
+        """
+        self.max_distance = max_distance
+        self.literal_mappings = list(literal_mappings)
+
+        # a mapping from normalized keys to the positions of their literal mappings
+        key_to_positions: defaultdict[str, list[int]] = defaultdict(list)
+        for position, literal_mapping in enumerate(self.literal_mappings):
+            key_to_positions[normalize_key(literal_mapping.text)].append(position)
+        self.keys = sorted(key_to_positions)
+        self.positions = [key_to_positions[key] for key in self.keys]
+
+        # a mapping from deletions to the positions of the keys that generate them
+        deletes: defaultdict[str, list[int]] = defaultdict(list)
+        for key_position, key in enumerate(self.keys):
+            for delete in _get_deletes(key, max_distance):
+                deletes[delete].append(key_position)
+        self.deletes = dict(deletes)
+
+    @classmethod
+    def default(cls, *, max_distance: int = 2) -> ApproximateIndex:
+        """Build an index over all positive synonyms in Biosynonyms."""
+        from .resources import get_positive_synonyms
+
+        return cls(get_positive_synonyms(), max_distance=max_distance)
+
+    def search(
+        self,
+        text: str,
+        *,
+        max_distance: int | None = None,
+        min_score: float = 0.0,
+        limit: int | None = None,
+    ) -> list[ScoredLiteralMapping]:
+        """Get literal mappings whose text is within a bounded edit distance of the query.
+
+        :param text: The query text
+        :param max_distance: The maximum edit distance to allow. Defaults to (and can't
+            exceed) the maximum distance the index was built with.
+        :param min_score: The minimum score, which is one minus the edit distance
+            divided by the length of the longer normalized string
+        :param limit: The maximum number of results to return
+        :returns: Scored literal mappings, sorted by descending score
+        :raises ValueError: if the maximum distance is larger than the index supports
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        elif max_distance > self.max_distance:
+            raise ValueError(
+                f"index was built with max_distance={self.max_distance}, got {max_distance}"
+            )
+        query = normalize_key(text)
+        key_positions = {
+            key_position
+            for delete in _get_deletes(query, max_distance)
+            for key_position in self.deletes.get(delete, [])
+        }
+        rv = []
+        for key_position in key_positions:
+            key = self.keys[key_position]
+            distance = _bounded_levenshtein(query, key, max_distance)
+            if distance is None:
+                continue
+            score = 1.0 - distance / max(len(query), len(key), 1)
+            if score < min_score:
+                continue
+            for position in self.positions[key_position]:
+                rv.append(ScoredLiteralMapping(self.literal_mappings[position], distance, score))
+        rv.sort(key=lambda scored: (-scored.score, scored.literal_mapping))
+        if limit is not None:
+            rv = rv[:limit]
+        return rv
+
+    def search_batch(
+        self,
+        texts: Iterable[str],
+        *,
+        max_distance: int | None = None,
+        min_score: float = 0.0,
+        limit: int | None = None,
+        max_workers: int | None = None,
+        chunksize: int = 10_000,
+    ) -> list[list[ScoredLiteralMapping]]:
+        """Search for many texts, optionally in parallel.
+
+        :param texts: The query texts
+        :param max_distance: See :meth:`search`
+        :param min_score: See :meth:`search`
+        :param limit: See :meth:`search`
+        :param max_workers: If given and larger than one, searches are distributed
+            across this many worker processes, which each get a copy of the index when
+            they start.
+        :param chunksize: The number of texts sent to a worker at a time
+        :returns: A list of results, in the same order as the query texts
+        """
+        if max_workers is None or max_workers <= 1:
+            return [
+                self.search(text, max_distance=max_distance, min_score=min_score, limit=limit)
+                for text in texts
+            ]
+        func = call_in_worker(
+            ApproximateIndex.search, max_distance=max_distance, min_score=min_score, limit=limit
+        )
+        with get_process_pool(max_workers, self) as executor:
+            return list(executor.map(func, texts, chunksize=chunksize))
+
+    def save(self, path: str | Path) -> None:
+        """Save the index as gzipped JSON, so it doesn't have to be rebuilt."""
+        data = {
+            "max_distance": self.max_distance,
+            "literal_mappings": [
+                literal_mapping.model_dump(mode="json", exclude_none=True)
+                for literal_mapping in self.literal_mappings
+            ],
+            "keys": self.keys,
+            "positions": self.positions,
+            "deletes": self.deletes,
+        }
+        with gzip.open(path, "wt") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str | Path) -> ApproximateIndex:
+        """Load an index that was saved with :meth:`save`."""
+        with gzip.open(path, "rt") as file:
+            data = json.load(file)
+        rv = cls.__new__(cls)
+        rv.max_distance = data["max_distance"]
+        rv.literal_mappings = [
+            LiteralMapping.model_validate(record) for record in data["literal_mappings"]
+        ]
+        rv.keys = data["keys"]
+        rv.positions = data["positions"]
+        rv.deletes = data["deletes"]
+        return rv
+
+
+def _get_deletes(text: str, max_distance: int) -> set[str]:
+    """Get all strings reachable by deleting up to the given number of characters."""
+    rv = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        frontier = {s[:i] + s[i + 1 :] for s in frontier for i in range(len(s))} - rv
+        if not frontier:
+            break
+        rv.update(frontier)
+    return rv
+
+
+def _bounded_levenshtein(left: str, right: str, max_distance: int) -> int | None:
+    """Calculate the Levenshtein distance, or None if it exceeds the maximum."""
+    if abs(len(left) - len(right)) > max_distance:
+        return None
+    previous: Sequence[int] = range(len(right) + 1)
+    for i, left_char in enumerate(left, start=1):
+        current = [i]
+        for j, right_char in enumerate(right, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (left_char != right_char),
+                )
+            )
+        if min(current) > max_distance:
+            return None
+        previous = current
+    distance = previous[-1]
+    if distance > max_distance:
+        return None
+    return distance
@@ -0,0 +1,132 @@
+"""Command line interface for Biosynonyms.
+
+This extends the curation CLI from :mod:`ssslm` (``lint`` and ``export``) with
+Biosynonyms-specific commands. Run with ``python -m biosynonyms --help``.
+"""
+
+from pathlib import Path
+
+import click
+
+from .resources import REPOSITORY
+
+__all__ = [
+    "main",
+]
+
+main = REPOSITORY.get_cli()
+
+
+@main.command()
+@click.option(
+    "--input",
+    "input_path",
+    type=Path,
+    help="A counter file of ungrounded text. Defaults to the one written by the INDRA workflow.",
+)
+@click.option("--output", type=Path, help="The path to write suggestions in positives.tsv format")
+@click.option("--min-count", type=int, default=2, show_default=True)
+@click.option("--min-score", type=float, default=0.3, show_default=True)
+@click.option("--gilda", is_flag=True, help="Also match against the default Gilda vocabulary")
+@click.option("--workers", type=int, help="The number of worker processes for scoring")
+def mine(
+    input_path: Path | None,
+    output: Path | None,
+    min_count: int,
+    min_score: float,
+    gilda: bool,
+    workers: int | None,
+) -> None:
+    """Mine candidate synonyms from ungrounded text counts."""
+    import itertools as itt
+
+    from . import mine as _mine
+    from .constants import COUNTER_PATH, MINED_PATH
+    from .resources import get_positive_synonyms
+
+    targets = _mine.iter_literal_mapping_targets(get_positive_synonyms())
+    if gilda:
+        targets = itt.chain(targets, _mine.iter_gilda_targets())
+    index = _mine.CandidateIndex(targets)
+    counts = _mine.iter_counts(input_path or COUNTER_PATH, min_count=min_count)
+    suggestions = _mine.mine(counts, index=index, min_score=min_score, max_workers=workers)
+    output = output or MINED_PATH
+    click.echo(f"Writing {len(suggestions):,} suggestions to {output}")
+    _mine.write_suggestions(suggestions, output)
+
+
+@main.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8765, show_default=True)
+@click.option(
+    "--processes",
+    type=int,
+    help="Ground batches in worker processes. By default, uses a single background thread.",
+)
+@click.option("--max-batch-size", type=int, default=64, show_default=True)
+@click.option(
+    "--max-wait-ms",
+    type=float,
+    default=2.0,
+    show_default=True,
+    help="How long to wait for a batch to fill",
+)
+@click.option(
+    "--max-pending",
+    type=int,
+    default=256,
+    show_default=True,
+    help="How many requests each connection can have in flight before the server stops reading",
+)
+def serve(
+    host: str,
+    port: int,
+    processes: int | None,
+    max_batch_size: int,
+    max_wait_ms: float,
+    max_pending: int,
+) -> None:
+    """Serve the grounder over JSON lines, batching concurrent requests."""
+    import logging
+
+    from .serve import run_server
+
+    logging.basicConfig(level=logging.INFO)
+    click.echo(f"Serving on {host}:{port}")
+    run_server(
+        host=host,
+        port=port,
+        processes=processes,
+        max_batch_size=max_batch_size,
+        max_wait=max_wait_ms / 1000,
+        max_pending=max_pending,
+    )
+
+
+@main.command()
+@click.argument("path", type=Path)
+def freeze(path: Path) -> None:
+    """Freeze synonyms into a flat file that workers can memory map."""
+    from .frozen import freeze as _freeze
+
+    _freeze(path)
+    click.echo(f"Wrote frozen synonyms to {path}")
+
+
+@main.command()
+@click.argument("paths", type=Path, nargs=-1, required=True)
+@click.option("--output", type=Path, help="The path to write all matches as a TSV")
+@click.option("--workers", type=int, help="The number of files to stream in parallel")
+def crosscheck(paths: tuple[Path, ...], output: Path | None, workers: int | None) -> None:
+    """Check synonyms against external ssslm TSV or OBO synonym dumps."""
+    from collections import Counter
+
+    from .crosscheck import cross_check, write_findings
+
+    findings = cross_check(paths, max_workers=workers)
+    counter = Counter((finding.source, finding.kind) for finding in findings)
+    for (source, kind), count in sorted(counter.items()):
+        click.echo(f"{source}\t{kind}\t{count:,}")
+    if output is not None:
+        click.echo(f"Writing {len(findings):,} matches to {output}")
+        write_findings(findings, output)
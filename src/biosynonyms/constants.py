@@ -0,0 +1,35 @@
+"""Paths and constants shared by the INDRA-based prediction and mining workflows."""
+
+import pystow
+
+__all__ = [
+    "COUNTER_PATH",
+    "COUNTER_TOP_PATH",
+    "DELTA_PATH",
+    "EMBEDDINGS_PATH",
+    "MINED_PATH",
+    "MODULE",
+    "PAIRS_PATH",
+    "PLOT_PATH",
+    "PROFILE_DIRECTORY",
+    "PROFILE_PATH",
+    "PRUNED_PAIRS_PATH",
+    "PRUNED_REPORT_PATH",
+    "REPORT_PATH",
+    "TEXT_PREFIX",
+]
+
+MODULE = pystow.module("indra", "db")
+PAIRS_PATH = MODULE.join(name="biosynonyms_pairs.tsv")
+COUNTER_PATH = MODULE.join(name="biosynonyms_counter.tsv")
+COUNTER_TOP_PATH = MODULE.join(name="biosynonyms_counter_top_1000.tsv")
+DELTA_PATH = MODULE.join(name="biosynonyms_delta.sqlite")
+EMBEDDINGS_PATH = MODULE.join(name="biosynonyms_embeddings.parquet")
+MINED_PATH = MODULE.join(name="biosynonyms_mined.tsv")
+PLOT_PATH = MODULE.join(name="plot.png")
+REPORT_PATH = MODULE.join(name="biosynonyms_pairs_report.json")
+PROFILE_PATH = MODULE.join(name="biosynonyms_pairs.prof")
+PROFILE_DIRECTORY = MODULE.join("profiles")
+PRUNED_PAIRS_PATH = MODULE.join(name="biosynonyms_pairs_pruned.tsv")
+PRUNED_REPORT_PATH = MODULE.join(name="biosynonyms_pairs_pruned_report.json")
+TEXT_PREFIX = "text"
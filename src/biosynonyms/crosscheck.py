@@ -0,0 +1,256 @@
+"""Cross-check curated synonyms against large external synonym dumps.
+
+Before accepting curations, it's useful to know which positive synonyms are
+already asserted by an ontology, which negative synonyms an ontology asserts
+anyway, and which texts that are known not to be named entities show up as an
+ontology's synonyms. Rather than loading the external files into memory, this
+builds a hash index of the Biosynonyms texts (keyed by casefolded text, keeping
+the original text to tell exact matches from casefolded ones) and streams each
+external file against it. Memory use depends on the size of Biosynonyms and the
+number of matches, not on the size of the external files.
+
+External files can either be in the :mod:`ssslm` TSV format (i.e., with a header
+containing ``text`` and ``curie`` columns) or OBO flat files, whose term names
+and synonyms are used. Either can be gzipped.
+
+Run with ``python -m biosynonyms crosscheck chebi.obo.gz mesh.ssslm.tsv.gz``.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, NamedTuple
+
+import bioregistry
+from ssslm import LiteralMapping
+
+from .workers import call_in_worker, get_process_pool
+
+__all__ = [
+    "Finding",
+    "SynonymKeyIndex",
+    "cross_check",
+    "iter_pairs",
+    "write_findings",
+]
+
+#: An external synonym matches a positive synonym with the same CURIE
+DUPLICATE = "duplicate"
+#: An external synonym matches a negative synonym with the same CURIE
+NEGATIVE = "negative"
+#: An external synonym's text is known not to be a named entity
+UNENTITY = "unentity"
+
+FINDINGS_HEADER = [
+    "source",
+    "kind",
+    "match",
+    "text",
+    "curie",
+    "external_text",
+    "external_curie",
+    "frequency",
+]
+
+#: Matches the quoted text in an OBO synonym line, e.g., ``synonym: "text" EXACT []``
+SYNONYM_RE = re.compile(r'^synonym:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class Finding(NamedTuple):
+    """A match between an external synonym and Biosynonyms."""
+
+    #: The external file the match came from
+    source: str
+    #: One of ``duplicate``, ``negative``, or ``unentity``
+    kind: str
+    #: Either ``exact`` or ``casefold``
+    match: str
+    #: The text in Biosynonyms
+    text: str
+    #: The CURIE in Biosynonyms, or an empty string for unentities
+    curie: str
+    #: The text in the external file
+    external_text: str
+    #: The CURIE in the external file
+    external_curie: str
+    #: The number of times the match appeared in the external file
+    frequency: int
+
+
+#: A kind, Biosynonyms text, and Biosynonyms CURIE indexed under a casefolded key
+Entry = tuple[str, str, str]
+
+
+class SynonymKeyIndex:
+    """A hash index of Biosynonyms texts, keyed by their casefolded form."""
+
+    def __init__(
+        self,
+        positives: Iterable[LiteralMapping],
+        negatives: Iterable[LiteralMapping],
+        unentities: Iterable[str],
+    ) -> None:
+        """Build an index.
+
+        :param positives: Positive literal mappings
+        :param negatives: Negative literal mappings
+        :param unentities: Strings that are known not to be named entities
+        """
+        self.entries: defaultdict[str, list[Entry]] = defaultdict(list)
+        for literal_mapping in positives:
+            self._add(DUPLICATE, literal_mapping.text, literal_mapping.curie)
+        for literal_mapping in negatives:
+            self._add(NEGATIVE, literal_mapping.text, literal_mapping.curie)
+        for text in unentities:
+            self._add(UNENTITY, text, "")
+
+    def _add(self, kind: str, text: str, curie: str) -> None:
+        self.entries[text.casefold()].append((kind, text, curie))
+
+    @classmethod
+    def default(cls) -> SynonymKeyIndex:
+        """Build an index from the synonyms and unentities in Biosynonyms."""
+        from .resources import get_negative_synonyms, get_positive_synonyms, load_unentities
+
+        return cls(get_positive_synonyms(), get_negative_synonyms(), load_unentities())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def match(self, text: str, curie: str) -> Iterator[tuple[str, str, str, str]]:
+        """Find entries matching an external synonym.
+
+        :param text: The text of the external synonym
+        :param curie: The CURIE of the external synonym, which is normalized only
+            if the text matches an entry
+        :yields: Tuples of the kind, match type, Biosynonyms text, and Biosynonyms CURIE
+        """
+        entries = self.entries.get(text.casefold())
+        if entries:
+            yield from _match_entries(entries, text, _normalize_curie(curie))
+
+    def check_file(self, path: str | Path) -> list[Finding]:
+        """Stream an external synonym file against the index.
+
+        :param path: An ssslm TSV or OBO file, optionally gzipped
+        :returns: Matches, aggregated over identical external synonyms, with the
+            external CURIEs normalized
+        """
+        counter: Counter[tuple[str, str, str, str, str, str]] = Counter()
+        for text, curie in iter_pairs(path):
+            entries = self.entries.get(text.casefold())
+            if not entries:
+                continue
+            # most external texts don't hit the index, so CURIEs are only
+            # normalized (which is slow, but memoized) after a hit
+            curie = _normalize_curie(curie)
+            for kind, match, entry_text, entry_curie in _match_entries(entries, text, curie):
+                counter[kind, match, entry_text, entry_curie, text, curie] += 1
+        source = str(path)
+        return sorted(Finding(source, *key, frequency) for key, frequency in counter.items())
+
+
+def _match_entries(
+    entries: Iterable[Entry], text: str, curie: str
+) -> Iterator[tuple[str, str, str, str]]:
+    for kind, entry_text, entry_curie in entries:
+        if kind != UNENTITY and entry_curie != curie:
+            continue
+        yield kind, "exact" if entry_text == text else "casefold", entry_text, entry_curie
+
+
+def _open(path: Path) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", newline="")
+    return path.open(newline="")
+
+
+def _is_obo(path: Path) -> bool:
+    return ".obo" in path.suffixes
+
+
+def iter_pairs(path: str | Path) -> Iterator[tuple[str, str]]:
+    """Stream (text, CURIE) pairs from an ssslm TSV or an OBO file, optionally gzipped.
+
+    CURIEs are yielded as they appear in the file. :meth:`SynonymKeyIndex.check_file`
+    normalizes them with :func:`bioregistry.normalize_curie` only when their text
+    matches, so they can be compared to the ones in Biosynonyms.
+    """
+    path = Path(path)
+    if _is_obo(path):
+        yield from _iter_obo_pairs(path)
+    else:
+        yield from _iter_tsv_pairs(path)
+
+
+def _iter_tsv_pairs(path: Path) -> Iterator[tuple[str, str]]:
+    with _open(path) as file:
+        # like ssslm.read_literal_mappings, this skips blank rows
+        for record in csv.DictReader(file, delimiter="\t"):
+            text, curie = record.get("text"), record.get("curie")
+            if text and curie:
+                yield text, curie
+
+
+def _iter_obo_pairs(path: Path) -> Iterator[tuple[str, str]]:
+    curie: str | None = None
+    in_term = False
+    with _open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("["):
+                in_term = line == "[Term]"
+                curie = None
+            elif not in_term:
+                continue
+            elif line.startswith("id:"):
+                curie = line[3:].strip()
+            elif curie is None:
+                continue
+            elif line.startswith("name:"):
+                yield line[5:].strip(), curie
+            elif match := SYNONYM_RE.match(line):
+                yield match.group(1).replace('\\"', '"'), curie
+
+
+@lru_cache(maxsize=100_000)
+def _normalize_curie(curie: str) -> str:
+    return bioregistry.normalize_curie(curie) or curie
+
+
+def cross_check(
+    paths: Sequence[str | Path],
+    *,
+    index: SynonymKeyIndex | None = None,
+    max_workers: int | None = None,
+) -> list[Finding]:
+    """Cross-check Biosynonyms against several external synonym files.
+
+    :param paths: ssslm TSV or OBO files, optionally gzipped
+    :param index: An index of Biosynonyms texts. If not given, uses
+        :meth:`SynonymKeyIndex.default`.
+    :param max_workers: If given and larger than one, files are streamed in this
+        many worker processes, see :func:`biosynonyms.workers.get_process_pool`.
+    :returns: Matches from all files, in the order of the given paths
+    """
+    if index is None:
+        index = SynonymKeyIndex.default()
+    if max_workers is None or max_workers <= 1 or len(paths) <= 1:
+        return [finding for path in paths for finding in index.check_file(path)]
+    with get_process_pool(min(max_workers, len(paths)), index) as executor:
+        results = executor.map(call_in_worker(SynonymKeyIndex.check_file), paths)
+        return [finding for findings in results for finding in findings]
+
+
+def write_findings(findings: Iterable[Finding], path: str | Path) -> None:
+    """Write findings to a TSV file."""
+    with Path(path).open("w", newline="") as file:
+        writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+        writer.writerow(FINDINGS_HEADER)
+        writer.writerows(findings)
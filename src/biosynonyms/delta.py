@@ -0,0 +1,357 @@
+"""Incrementally update the INDRA pairs graph between dump versions.
+
+Each line in an INDRA processed statements dump starts with the statement's
+assembled hash. A :class:`DeltaStore` keeps the hashes that have already been
+processed, along with the distinct edges each one contributed, in a SQLite
+database. Given a new dump, only statements whose hashes weren't seen before
+are processed, and statements that disappeared have their edges subtracted.
+The store keeps the edge multiset (how many statements contribute each edge)
+up to date, so the pairs and counter files can be written without reprocessing
+everything.
+
+Edges depend on the grounder and on the unentities that were filtered when each
+statement was processed, so the store records both:
+
+- a fingerprint of the grounder. If it changes, the store has to be rebuilt.
+- the unentities that have been applied. Adding unentities is fine, since the
+  current unentities are filtered again when writing. Removing any means the
+  edges that were dropped can't be recovered, so the store has to be rebuilt.
+
+Progress is committed every few batches, so an interrupted first run (which
+processes the whole dump) can be resumed without reprocessing statements
+that were already stored.
+"""
+
+from __future__ import annotations
+
+import csv
+import itertools as itt
+import sqlite3
+from collections.abc import Callable, Collection, Iterable, Iterator, Sequence
+from pathlib import Path
+
+from curies import ReferenceTuple
+from tqdm import tqdm
+
+from .constants import TEXT_PREFIX
+from .instrumentation import RunReport
+
+__all__ = [
+    "DeltaStore",
+]
+
+Row = tuple[ReferenceTuple, ReferenceTuple]
+#: A function that turns a batch of lines (without their hashes) into rows for each line
+BatchProcessor = Callable[[Sequence[str]], Sequence[Iterable[Row]]]
+
+#: The maximum number of parameters used in a single ``IN (...)`` clause
+_IN_CHUNK_SIZE = 500
+
+SCHEMA = """\
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS unentities (
+    text TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS statements (
+    hash INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS seen (
+    hash INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    prefix TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    UNIQUE (prefix, identifier)
+);
+CREATE TABLE IF NOT EXISTS statement_edges (
+    hash INTEGER NOT NULL,
+    source INTEGER NOT NULL,
+    target INTEGER NOT NULL,
+    PRIMARY KEY (hash, source, target)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edges (
+    source INTEGER NOT NULL,
+    target INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (source, target)
+) WITHOUT ROWID;
+"""
+
+#: Tables that are emptied when the store is rebuilt
+TABLES = ["metadata", "unentities", "statements", "seen", "nodes", "statement_edges", "edges"]
+
+#: Selects nodes that are filtered as unentities when writing
+_UNENTITY_NODES = (
+    "SELECT id FROM nodes WHERE prefix = ? AND identifier IN (SELECT text FROM unentities)"
+)
+
+
+class DeltaStore:
+    """An on-disk record of processed statement hashes and the edges they contributed."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open (or create) a store.
+
+        :param path: The path to the SQLite database
+        """
+        self.connection = sqlite3.connect(str(path))
+        self.connection.executescript(SCHEMA)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self._node_ids: dict[tuple[str, str], int] = {}
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self.connection.close()
+
+    def __len__(self) -> int:
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM statements").fetchone()
+        return int(count)
+
+    def get_fingerprint(self) -> str | None:
+        """Get the fingerprint of the grounder used to build the store, if it's been built."""
+        row = self.connection.execute(
+            "SELECT value FROM metadata WHERE key = 'fingerprint'"
+        ).fetchone()
+        return None if row is None else str(row[0])
+
+    def get_unentities(self) -> set[str]:
+        """Get the unentities that have been applied to the store."""
+        return {text for (text,) in self.connection.execute("SELECT text FROM unentities")}
+
+    def clear(self) -> None:
+        """Remove everything from the store, so it can be rebuilt."""
+        for table in TABLES:
+            self.connection.execute(f"DELETE FROM {table}")  # noqa:S608
+        self.connection.commit()
+        self._node_ids.clear()
+
+    def update(
+        self,
+        lines: Iterable[str],
+        process: BatchProcessor,
+        *,
+        fingerprint: str = "",
+        unentities: Collection[str] = (),
+        rebuild: bool = False,
+        batch_size: int = 10_000,
+        commit_every: int = 10,
+        report: RunReport | None = None,
+    ) -> RunReport:
+        """Update the store to match a dump.
+
+        :param lines: Lines from a processed statements dump, each starting with an
+            assembled hash then a tab
+        :param process: A function that turns a batch of lines (with the hash removed)
+            into the rows for each line. It's only called on statements that aren't
+            already in the store.
+        :param fingerprint: Identifies the grounder (and anything else) used by ``process``
+        :param unentities: The unentities filtered by ``process``
+        :param rebuild: Should the store be cleared first? This is required if the
+            fingerprint changed or unentities were removed since the last update.
+        :param batch_size: The number of lines to check against the store at a time
+        :param commit_every: The number of batches to process between commits
+        :param report: An existing report to add counts and timings to
+        :returns: A report with the number of added, removed, and unchanged statements
+        :raises ValueError: If the store can't be updated without being rebuilt
+        """
+        if report is None:
+            report = RunReport()
+        if rebuild:
+            self.clear()
+        else:
+            self._check_compatible(fingerprint, unentities)
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT OR REPLACE INTO metadata VALUES ('fingerprint', ?)", (fingerprint,))
+        cursor.executemany(
+            "INSERT OR IGNORE INTO unentities VALUES (?)", ((text,) for text in unentities)
+        )
+        cursor.execute("DELETE FROM seen")
+        self.connection.commit()
+
+        iterator = iter(lines)
+        for i, batch in enumerate(iter(lambda: list(itt.islice(iterator, batch_size)), []), 1):
+            with report.stage("delta_check"):
+                hash_to_body: dict[int, str] = {}
+                for line in batch:
+                    hash_str, body = line.split("\t", 1)
+                    hash_to_body.setdefault(int(hash_str), body)
+                # skip hashes that already appeared earlier in the same dump
+                new_hashes = [
+                    h
+                    for h in hash_to_body
+                    if cursor.execute("INSERT OR IGNORE INTO seen VALUES (?)", (h,)).rowcount
+                ]
+                existing = self._get_existing(cursor, new_hashes)
+                added = [h for h in new_hashes if h not in existing]
+                report.increment("statements.unchanged", len(new_hashes) - len(added))
+                report.increment("statements.added", len(added))
+            if added:
+                with report.stage("process"):
+                    results = process([hash_to_body[h] for h in added])
+                with report.stage("delta_add"):
+                    for h, rows in zip(added, results, strict=True):
+                        self._add_statement(cursor, h, rows, report)
+            if i % commit_every == 0:
+                self.connection.commit()
+
+        with report.stage("delta_remove"):
+            removed = [
+                h
+                for (h,) in cursor.execute(
+                    "SELECT hash FROM statements WHERE hash NOT IN (SELECT hash FROM seen)"
+                ).fetchall()
+            ]
+            for h in removed:
+                self._remove_statement(cursor, h, report)
+            report.increment("statements.removed", len(removed))
+            cursor.execute("DELETE FROM seen")
+
+        self.connection.commit()
+        return report
+
+    def _check_compatible(self, fingerprint: str, unentities: Collection[str]) -> None:
+        if not len(self):
+            return
+        if self.get_fingerprint() != fingerprint:
+            raise ValueError(
+                "the grounder changed since the store was built, so it needs a rebuild"
+            )
+        removed = self.get_unentities().difference(unentities)
+        if removed:
+            raise ValueError(
+                f"{len(removed):,} unentities were removed since the store was built, "
+                f"so it needs a rebuild (e.g., {min(removed)})"
+            )
+
+    @staticmethod
+    def _get_existing(cursor: sqlite3.Cursor, hashes: Sequence[int]) -> set[int]:
+        rv: set[int] = set()
+        for start in range(0, len(hashes), _IN_CHUNK_SIZE):
+            chunk = hashes[start : start + _IN_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rv.update(
+                h
+                for (h,) in cursor.execute(
+                    f"SELECT hash FROM statements WHERE hash IN ({placeholders})",  # noqa:S608
+                    chunk,
+                )
+            )
+        return rv
+
+    def _get_node_id(self, cursor: sqlite3.Cursor, reference: ReferenceTuple) -> int:
+        key = reference.prefix, reference.identifier
+        node_id = self._node_ids.get(key)
+        if node_id is not None:
+            return node_id
+        cursor.execute("INSERT OR IGNORE INTO nodes (prefix, identifier) VALUES (?, ?)", key)
+        (node_id,) = cursor.execute(
+            "SELECT id FROM nodes WHERE prefix = ? AND identifier = ?", key
+        ).fetchone()
+        self._node_ids[key] = node_id
+        return int(node_id)
+
+    def _add_statement(
+        self, cursor: sqlite3.Cursor, h: int, rows: Iterable[Row], report: RunReport
+    ) -> None:
+        cursor.execute("INSERT INTO statements VALUES (?)", (h,))
+        edges = {
+            (self._get_node_id(cursor, source), self._get_node_id(cursor, target))
+            for source, target in rows
+        }
+        cursor.executemany(
+            "INSERT INTO statement_edges VALUES (?, ?, ?)", ((h, s, t) for s, t in edges)
+        )
+        for source, target in edges:
+            cursor.execute(
+                "INSERT INTO edges VALUES (?, ?, 1) "
+                "ON CONFLICT (source, target) DO UPDATE SET count = count + 1",
+                (source, target),
+            )
+            (count,) = cursor.execute(
+                "SELECT count FROM edges WHERE source = ? AND target = ?", (source, target)
+            ).fetchone()
+            if count == 1:
+                report.increment("edges.added")
+
+    def _remove_statement(self, cursor: sqlite3.Cursor, h: int, report: RunReport) -> None:
+        edges = cursor.execute(
+            "SELECT source, target FROM statement_edges WHERE hash = ?", (h,)
+        ).fetchall()
+        for source, target in edges:
+            cursor.execute(
+                "UPDATE edges SET count = count - 1 WHERE source = ? AND target = ?",
+                (source, target),
+            )
+            (count,) = cursor.execute(
+                "SELECT count FROM edges WHERE source = ? AND target = ?", (source, target)
+            ).fetchone()
+            if count == 0:
+                report.increment("edges.removed")
+                cursor.execute(
+                    "DELETE FROM edges WHERE source = ? AND target = ?", (source, target)
+                )
+        cursor.execute("DELETE FROM statement_edges WHERE hash = ?", (h,))
+        cursor.execute("DELETE FROM statements WHERE hash = ?", (h,))
+
+    def iter_rows(self) -> Iterator[Row]:
+        """Iterate over distinct edges, sorted the same way as the pairs file.
+
+        Edges with a ``text:`` node that's an unentity are skipped.
+        """
+        query = f"""\
+            SELECT s.prefix, s.identifier, t.prefix, t.identifier
+            FROM edges e
+            JOIN nodes s ON e.source = s.id
+            JOIN nodes t ON e.target = t.id
+            WHERE e.source NOT IN ({_UNENTITY_NODES}) AND e.target NOT IN ({_UNENTITY_NODES})
+            ORDER BY s.prefix, s.identifier, t.prefix, t.identifier
+        """  # noqa:S608
+        for sp, si, tp, ti in self.connection.execute(query, (TEXT_PREFIX, TEXT_PREFIX)):
+            yield ReferenceTuple(sp, si), ReferenceTuple(tp, ti)
+
+    def get_text_counts(self) -> list[tuple[str, int]]:
+        """Get the number of distinct edges each text node is in, most common first.
+
+        Edges with a ``text:`` node that's an unentity aren't counted.
+        """
+        query = f"""\
+            WITH kept AS (
+                SELECT source, target FROM edges
+                WHERE source NOT IN ({_UNENTITY_NODES}) AND target NOT IN ({_UNENTITY_NODES})
+            ),
+            endpoints AS (
+                SELECT source AS id FROM kept UNION ALL SELECT target AS id FROM kept
+            )
+            SELECT n.identifier, COUNT(*) AS degree
+            FROM endpoints e
+            JOIN nodes n ON e.id = n.id
+            WHERE n.prefix = ?
+            GROUP BY n.id
+            ORDER BY degree DESC, n.identifier
+        """  # noqa:S608
+        return self.connection.execute(query, (TEXT_PREFIX, TEXT_PREFIX, TEXT_PREFIX)).fetchall()
+
+    def write_pairs(self, path: str | Path) -> None:
+        """Write the distinct edges as a tab-separated pairs file."""
+        with Path(path).open("w") as file:
+            for source, target in tqdm(self.iter_rows(), desc="writing", unit_scale=True):
+                print(source.curie, target.curie, sep="\t", file=file)
+
+    def write_counter(self, path: str | Path, *, top_path: str | Path | None = None) -> None:
+        """Write text counts in the same format as the counter file from the full build."""
+        counts = self.get_text_counts()
+        _write_counts(path, counts)
+        if top_path is not None:
+            _write_counts(top_path, counts[:1000])
+
+
+def _write_counts(path: str | Path, counts: Iterable[tuple[str, int]]) -> None:
+    with Path(path).open("w", newline="") as file:
+        writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+        writer.writerow(("synonym", "count"))
+        writer.writerows(counts)
@@ -0,0 +1,286 @@
+"""Frozen, flat synonym tables that can be shared between worker processes.
+
+Each worker process that loads Biosynonyms normally builds its own Python
+objects for every literal mapping. Since reference counting writes to those
+objects, copy-on-write sharing after forking doesn't help and memory grows
+with the number of workers. :func:`freeze` instead writes positive and negative
+synonyms along with a sorted lookup index into a single flat, immutable buffer.
+Workers attach to it read-only with :meth:`FrozenSynonyms.open`, which memory
+maps the file so all processes share the same pages in the OS page cache.
+Literal mappings are only decoded when they're looked up.
+
+.. code-block:: python
+
+    from biosynonyms.frozen import FrozenSynonyms, freeze
+
+    freeze("biosynonyms.frozen")  # once, e.g., before forking workers
+
+    # in each worker
+    frozen = FrozenSynonyms.open("biosynonyms.frozen")
+    frozen.get_curies("YAL021C")  # ['sgd:S000000019']
+
+Any other buffer works too, e.g., to use :mod:`multiprocessing.shared_memory`:
+
+.. code-block:: python
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    data = freeze_to_bytes()
+    shm = SharedMemory(name="biosynonyms", create=True, size=len(data))
+    shm.buf[: len(data)] = data
+
+    # in each worker
+    frozen = FrozenSynonyms(SharedMemory(name="biosynonyms").buf)
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from ssslm import LiteralMapping
+from ssslm.model import LiteralMappingTuple
+
+__all__ = [
+    "FrozenSynonyms",
+    "freeze",
+    "freeze_to_bytes",
+]
+
+#: The magic bytes, whose last byte is the version of the layout. Bump it whenever
+#: the layout changes, so buffers frozen by an older version aren't misread.
+MAGIC = b"BSYNFRZ2"
+#: The magic bytes, then the number of positive records, negative records, and
+#: keys, and the length of the column names
+HEADER_STRUCT = struct.Struct("=8sQQQQ")
+#: The number of bytes used for each offset
+OFFSET_SIZE = 8
+#: The number of bytes used for each record position in the postings
+POSTING_SIZE = 4
+
+
+def _get_key(text: str) -> bytes:
+    return text.casefold().encode("utf-8")
+
+
+def _encode_record(literal_mapping: LiteralMapping) -> bytes:
+    # ssslm doesn't have a public way to get a row, so this relies on the same
+    # private method that ssslm.write_literal_mappings uses. It returns a
+    # LiteralMappingTuple, whose column names are written along with the rows,
+    # so reading doesn't depend on their order in whichever version of ssslm.
+    row: LiteralMappingTuple = literal_mapping._as_row()
+    return "\t".join(value or "" for value in row).encode("utf-8")
+
+
+def freeze_to_bytes(
+    positives: Iterable[LiteralMapping] | None = None,
+    negatives: Iterable[LiteralMapping] | None = None,
+) -> bytes:
+    """Serialize literal mappings and a case-insensitive text index into a flat buffer.
+
+    :param positives: Positive literal mappings. Defaults to the ones in Biosynonyms.
+    :param negatives: Negative literal mappings. Defaults to the ones in Biosynonyms.
+    :returns: A buffer that can be read by :class:`FrozenSynonyms`
+
+    The layout is a header, then these sections, each aligned to 8 bytes:
+
+    0. column names (tab-separated UTF-8, padded)
+    1. record offsets (``n_records + 1`` uint64s in native byte order)
+    2. key offsets (``n_keys + 1`` uint64s)
+    3. posting offsets (``n_keys + 1`` uint64s)
+    4. postings (uint32 record positions, padded)
+    5. keys (casefolded UTF-8, sorted bytewise, concatenated)
+    6. records (tab-separated UTF-8 rows, concatenated)
+    """
+    from .resources import get_negative_synonyms, get_positive_synonyms
+
+    if positives is None:
+        positives = get_positive_synonyms()
+    if negatives is None:
+        negatives = get_negative_synonyms()
+    positives = list(positives)
+    negatives = list(negatives)
+    literal_mappings = [*positives, *negatives]
+
+    key_to_positions: defaultdict[bytes, list[int]] = defaultdict(list)
+    for position, literal_mapping in enumerate(literal_mappings):
+        key_to_positions[_get_key(literal_mapping.text)].append(position)
+    keys = sorted(key_to_positions)
+
+    columns = "\t".join(LiteralMappingTuple._fields).encode("utf-8")
+    records = [_encode_record(literal_mapping) for literal_mapping in literal_mappings]
+    postings = [position for key in keys for position in key_to_positions[key]]
+
+    sections = [
+        _pad(columns),
+        _pack_offsets(_cumulative(len(record) for record in records)),
+        _pack_offsets(_cumulative(len(key) for key in keys)),
+        _pack_offsets(_cumulative(len(key_to_positions[key]) for key in keys)),
+        _pad(struct.pack(f"={len(postings)}I", *postings)),
+        _pad(b"".join(keys)),
+        b"".join(records),
+    ]
+    header = HEADER_STRUCT.pack(MAGIC, len(positives), len(negatives), len(keys), len(columns))
+    return b"".join([_pad(header), *sections])
+
+
+def freeze(
+    path: str | Path,
+    positives: Iterable[LiteralMapping] | None = None,
+    negatives: Iterable[LiteralMapping] | None = None,
+) -> None:
+    """Write frozen synonym tables to a file, see :func:`freeze_to_bytes`."""
+    Path(path).write_bytes(freeze_to_bytes(positives=positives, negatives=negatives))
+
+
+def _cumulative(lengths: Iterable[int]) -> list[int]:
+    rv = [0]
+    for length in lengths:
+        rv.append(rv[-1] + length)
+    return rv
+
+
+def _pack_offsets(offsets: list[int]) -> bytes:
+    return struct.pack(f"={len(offsets)}Q", *offsets)
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % OFFSET_SIZE)
+
+
+class FrozenSynonyms:
+    """Read-only, zero-copy access to frozen synonym tables."""
+
+    def __init__(self, buffer: Any) -> None:
+        """Attach to a buffer created with :func:`freeze_to_bytes`.
+
+        :param buffer: Any object supporting the buffer protocol, such as
+            :class:`bytes`, :class:`mmap.mmap`, or the ``buf`` attribute of a
+            :class:`multiprocessing.shared_memory.SharedMemory`
+        :raises ValueError: If the buffer doesn't contain frozen synonym tables
+        """
+        self._buffer = buffer
+        view = memoryview(buffer).toreadonly().cast("B")
+        if len(view) < HEADER_STRUCT.size:
+            raise ValueError("buffer is too short to contain frozen synonym tables")
+        magic, n_positives, n_negatives, n_keys, columns_size = HEADER_STRUCT.unpack_from(view)
+        if magic[:-1] == MAGIC[:-1] and magic != MAGIC:
+            raise ValueError(
+                f"frozen synonym tables have version {chr(magic[-1])}, but this version "
+                f"of Biosynonyms reads version {chr(MAGIC[-1])}. Freeze them again."
+            )
+        if magic != MAGIC:
+            raise ValueError("buffer does not contain frozen synonym tables")
+        self.n_positives: int = n_positives
+        self.n_negatives: int = n_negatives
+        self.n_keys: int = n_keys
+        n_records = self.n_positives + self.n_negatives
+
+        cursor = HEADER_STRUCT.size + (-HEADER_STRUCT.size % OFFSET_SIZE)
+        self._columns = str(_take(view, cursor, columns_size), "utf-8").split("\t")
+        self._curie_column = self._columns.index("curie")
+        cursor += columns_size + (-columns_size % OFFSET_SIZE)
+        self._record_offsets, cursor = _take_offsets(view, cursor, n_records + 1)
+        self._key_offsets, cursor = _take_offsets(view, cursor, self.n_keys + 1)
+        self._posting_offsets, cursor = _take_offsets(view, cursor, self.n_keys + 1)
+        n_postings = self._posting_offsets[-1]
+        self._postings = _take(view, cursor, n_postings * POSTING_SIZE).cast("I")
+        cursor += n_postings * POSTING_SIZE
+        cursor += -cursor % OFFSET_SIZE
+        self._keys = _take(view, cursor, self._key_offsets[-1])
+        cursor += self._key_offsets[-1]
+        cursor += -cursor % OFFSET_SIZE
+        self._records = _take(view, cursor, self._record_offsets[-1])
+
+    @classmethod
+    def open(cls, path: str | Path) -> FrozenSynonyms:
+        """Memory map a file written with :func:`freeze` read-only."""
+        with Path(path).open("rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def __len__(self) -> int:
+        return self.n_positives + self.n_negatives
+
+    def get_positive_synonyms(self) -> list[LiteralMapping]:
+        """Get positive synonyms, like :func:`biosynonyms.get_positive_synonyms`."""
+        return [self._get_literal_mapping(i) for i in range(self.n_positives)]
+
+    def get_negative_synonyms(self) -> list[LiteralMapping]:
+        """Get negative synonyms, like :func:`biosynonyms.get_negative_synonyms`."""
+        return [self._get_literal_mapping(i) for i in range(self.n_positives, len(self))]
+
+    def lookup(self, text: str) -> list[LiteralMapping]:
+        """Get positive synonyms whose text matches, ignoring case."""
+        return [
+            self._get_literal_mapping(i) for i in self._iter_positions(text) if i < self.n_positives
+        ]
+
+    def lookup_negatives(self, text: str) -> list[LiteralMapping]:
+        """Get negative synonyms whose text matches, ignoring case."""
+        return [
+            self._get_literal_mapping(i)
+            for i in self._iter_positions(text)
+            if i >= self.n_positives
+        ]
+
+    def get_curies(self, text: str) -> list[str]:
+        """Get CURIEs for positive synonyms whose text matches, ignoring case.
+
+        This is faster than :meth:`lookup` since it doesn't construct literal mappings.
+        """
+        return [
+            self._get_fields(i)[self._curie_column]
+            for i in self._iter_positions(text)
+            if i < self.n_positives
+        ]
+
+    def _iter_positions(self, text: str) -> Iterator[int]:
+        key_position = self._find_key(_get_key(text))
+        if key_position is None:
+            return
+        start = self._posting_offsets[key_position]
+        end = self._posting_offsets[key_position + 1]
+        yield from self._postings[start:end]
+
+    def _find_key(self, key: bytes) -> int | None:
+        """Binary search the sorted keys without copying them out of the buffer."""
+        low, high = 0, self.n_keys
+        while low < high:
+            middle = (low + high) // 2
+            candidate = self._get_key(middle)
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def _get_key(self, position: int) -> bytes:
+        start = self._key_offsets[position]
+        end = self._key_offsets[position + 1]
+        return self._keys[start:end].tobytes()
+
+    def _get_fields(self, position: int) -> list[str]:
+        start = self._record_offsets[position]
+        end = self._record_offsets[position + 1]
+        return str(self._records[start:end], "utf-8").split("\t")
+
+    def _get_literal_mapping(self, position: int) -> LiteralMapping:
+        fields = self._get_fields(position)
+        return LiteralMapping.from_row(dict(zip(self._columns, fields, strict=True)))
+
+
+def _take(view: memoryview, cursor: int, size: int) -> memoryview:
+    if cursor + size > len(view):
+        raise ValueError("buffer is too short, the frozen synonym tables might be truncated")
+    return view[cursor : cursor + size]
+
+
+def _take_offsets(view: memoryview, cursor: int, n: int) -> tuple[memoryview, int]:
+    return _take(view, cursor, n * OFFSET_SIZE).cast("Q"), cursor + n * OFFSET_SIZE
@@ -0,0 +1,136 @@
+"""Lightweight instrumentation for long-running pipelines.
+
+A :class:`RunReport` accumulates cumulative per-stage timers and counters. It's
+picklable, so each worker process can build its own report and the parent can
+combine them with :meth:`RunReport.update` before writing a JSON summary.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+from collections import Counter, defaultdict
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TypeVar
+
+__all__ = [
+    "RunReport",
+    "get_peak_rss_mb",
+    "merge_profiles",
+    "profile_into",
+]
+
+X = TypeVar("X")
+
+#: A per-process profiler, so repeated calls to :func:`profile_into`
+#: accumulate into a single file for each worker
+_PROFILER: cProfile.Profile | None = None
+
+
+@dataclass
+class RunReport:
+    """Cumulative per-stage timings (in seconds) and counters for a run."""
+
+    timers: defaultdict[str, float] = field(default_factory=lambda: defaultdict(float))
+    counters: Counter[str] = field(default_factory=Counter)
+    #: Settings for the run (e.g., thresholds), to be recorded alongside the results
+    parameters: dict[str, Any] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None, None, None]:
+        """Attribute the time spent in the block to the given stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] += time.perf_counter() - start
+
+    def increment(self, name: str, n: int = 1) -> None:
+        """Increment a counter."""
+        self.counters[name] += n
+
+    def iter_timed(self, name: str, iterable: Iterable[X]) -> Iterable[X]:
+        """Yield from an iterable, attributing time spent producing elements to the stage."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                element = next(iterator)
+            except StopIteration:
+                self.timers[name] += time.perf_counter() - start
+                return
+            self.timers[name] += time.perf_counter() - start
+            yield element
+
+    def update(self, other: RunReport) -> None:
+        """Add the timers and counters from another report (e.g., from a worker) to this one."""
+        for name, seconds in other.timers.items():
+            self.timers[name] += seconds
+        self.counters.update(other.counters)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get a JSON-serializable summary, including the peak resident set size."""
+        return {
+            "parameters": self.parameters,
+            "timers": {name: round(seconds, 3) for name, seconds in sorted(self.timers.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "peak_rss_mb": get_peak_rss_mb(),
+            "peak_rss_children_mb": get_peak_rss_mb(children=True),
+        }
+
+    def write(self, path: str | Path) -> None:
+        """Write the summary as JSON."""
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+
+
+def get_peak_rss_mb(*, children: bool = False) -> float | None:
+    """Get the peak resident set size in megabytes, if the platform reports it.
+
+    :param children: If true, report the largest peak among terminated child processes
+        (e.g., multiprocessing workers) instead of the current process
+    :returns: The peak resident set size, or None on platforms without :mod:`resource`
+    """
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    max_rss = resource.getrusage(who).ru_maxrss
+    # macOS reports in bytes, Linux in kilobytes
+    if sys.platform == "darwin":
+        return round(max_rss / 1024**2, 1)
+    return round(max_rss / 1024, 1)
+
+
+@contextmanager
+def profile_into(directory: Path) -> Generator[None, None, None]:
+    """Profile the block with :mod:`cProfile`, accumulating stats into a per-process file.
+
+    :param directory: The directory into which ``<pid>.prof`` is written. Use
+        :func:`merge_profiles` to combine the files from all processes afterwards.
+    """
+    global _PROFILER
+    if _PROFILER is None:
+        _PROFILER = cProfile.Profile()
+    _PROFILER.enable()
+    try:
+        yield
+    finally:
+        _PROFILER.disable()
+        _PROFILER.dump_stats(directory.joinpath(f"{os.getpid()}.prof"))
+
+
+def merge_profiles(directory: Path, path: Path) -> None:
+    """Merge all per-process profiles in a directory into a single stats file."""
+    paths = sorted(directory.glob("*.prof"))
+    if not paths:
+        return
+    stats = pstats.Stats(*(str(p) for p in paths))
+    stats.dump_stats(path)
@@ -0,0 +1,300 @@
+"""Mine candidate synonyms from counts of ungrounded text.
+
+:func:`biosynonyms.predict.get_graph` writes a table of the most frequent
+ungrounded strings in INDRA to :data:`biosynonyms.constants.COUNTER_PATH`.
+Rather than running a grounder on each string, this module streams the table
+and generates candidates by blocking on a few cheap keys against all known
+synonyms:
+
+1. a normalized key, ignoring case, whitespace, and punctuation
+2. a token set signature, ignoring word order and repeated words
+3. acronyms, matching both a short form to the initials of a long form
+   synonym and a long form to a synonym that looks like a short form
+
+Acronym matches are ambiguous (e.g., "ER" could be the endoplasmic reticulum,
+estrogen receptor, or early response), so they score below the default minimum
+score of the ``mine`` command and are only kept when it's lowered.
+
+Suggestions are scored, filtered against unentities and negative synonyms, and
+written in the same format as ``positives.tsv`` so they can be curated.
+
+Run with ``python -m biosynonyms mine``
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import re
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+import ssslm
+from curies import NamableReference
+from ssslm import LiteralMapping
+from tqdm import tqdm
+
+from .resources import get_negative_synonyms, get_positive_synonyms, load_unentities
+from .workers import call_in_worker, get_process_pool
+
+__all__ = [
+    "CandidateIndex",
+    "Suggestion",
+    "Target",
+    "iter_counts",
+    "iter_gilda_targets",
+    "iter_literal_mapping_targets",
+    "mine",
+    "write_suggestions",
+]
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+#: Base scores for each blocking method, which get divided by the
+#: number of distinct references that share the block
+METHOD_SCORES = {
+    "key": 0.9,
+    "tokens": 0.8,
+    "acronym": 0.25,
+}
+
+
+class Target(NamedTuple):
+    """A known synonym that ungrounded text can be matched against."""
+
+    text: str
+    prefix: str
+    identifier: str
+    name: str | None
+
+
+class Suggestion(NamedTuple):
+    """A suggested synonym for ungrounded text."""
+
+    text: str
+    frequency: int
+    prefix: str
+    identifier: str
+    name: str | None
+    score: float
+    method: str
+
+    def to_literal_mapping(self) -> LiteralMapping:
+        """Get a literal mapping, with the score and provenance in the comment."""
+        return LiteralMapping(
+            text=self.text,
+            reference=NamableReference(
+                prefix=self.prefix, identifier=self.identifier, name=self.name
+            ),
+            comment=f"score={self.score:.3f}; count={self.frequency}; method={self.method}",
+        )
+
+
+def get_key(text: str) -> str:
+    """Get a key ignoring case, whitespace, and punctuation."""
+    return "".join(c for c in text.casefold() if c.isalnum())
+
+
+def get_tokens(text: str) -> list[str]:
+    """Get casefolded alphanumeric tokens."""
+    return TOKEN_RE.findall(text.casefold())
+
+
+def get_token_signature(text: str) -> str:
+    """Get a key ignoring case, punctuation, word order, and repeated words."""
+    return " ".join(sorted(set(get_tokens(text))))
+
+
+def get_acronym(text: str) -> str | None:
+    """Get an acronym from the initials of a multi-word text, if possible."""
+    tokens = get_tokens(text)
+    if len(tokens) < 2:
+        return None
+    return "".join(token[0] for token in tokens)
+
+
+def _looks_like_acronym(text: str) -> bool:
+    return 2 <= len(text) <= 10 and " " not in text and sum(c.isupper() for c in text) >= 2
+
+
+class CandidateIndex:
+    """An index of known synonyms, blocked on several cheap keys."""
+
+    def __init__(self, targets: Iterable[Target]) -> None:
+        """Build the index.
+
+        :param targets: Known synonyms, e.g., from :func:`iter_literal_mapping_targets`
+        """
+        self.targets = sorted(set(targets))
+        self.by_key: defaultdict[str, list[int]] = defaultdict(list)
+        self.by_tokens: defaultdict[str, list[int]] = defaultdict(list)
+        self.by_acronym: defaultdict[str, list[int]] = defaultdict(list)
+        #: Only targets that look like short forms, keyed by :func:`get_key`
+        self.by_short_form: defaultdict[str, list[int]] = defaultdict(list)
+        for position, target in enumerate(self.targets):
+            if key := get_key(target.text):
+                self.by_key[key].append(position)
+            if signature := get_token_signature(target.text):
+                self.by_tokens[signature].append(position)
+            if acronym := get_acronym(target.text):
+                self.by_acronym[acronym].append(position)
+            if _looks_like_acronym(target.text):
+                self.by_short_form[get_key(target.text)].append(position)
+
+    def suggest(self, text: str, count: int = 0) -> list[Suggestion]:
+        """Suggest the best scoring reference(s) for a text.
+
+        :param text: Ungrounded text
+        :param count: The number of times the text appeared in the corpus
+        :returns: The best suggestion for each reference, sorted by descending score
+        """
+        key = get_key(text)
+        if not key:
+            return []
+        blocks: list[tuple[str, list[int]]] = [
+            ("key", self.by_key.get(key, [])),
+            ("tokens", self.by_tokens.get(get_token_signature(text), [])),
+        ]
+        if _looks_like_acronym(text):
+            # the text is a short form of a long form synonym
+            blocks.append(("acronym", self.by_acronym.get(key, [])))
+        if acronym := get_acronym(text):
+            # the text is a long form of a short form synonym
+            blocks.append(("acronym", self.by_short_form.get(acronym, [])))
+
+        best: dict[tuple[str, str], Suggestion] = {}
+        for method, positions in blocks:
+            if not positions:
+                continue
+            references = {(self.targets[p].prefix, self.targets[p].identifier) for p in positions}
+            score = METHOD_SCORES[method] / len(references)
+            for position in positions:
+                target = self.targets[position]
+                reference = target.prefix, target.identifier
+                if reference in best and best[reference].score >= score:
+                    continue
+                best[reference] = Suggestion(
+                    text=text,
+                    frequency=count,
+                    prefix=target.prefix,
+                    identifier=target.identifier,
+                    name=target.name,
+                    score=score,
+                    method=method,
+                )
+        return sorted(best.values(), key=lambda s: (-s.score, s.prefix, s.identifier))
+
+
+def iter_literal_mapping_targets(literal_mappings: Iterable[LiteralMapping]) -> Iterator[Target]:
+    """Get targets from literal mappings."""
+    for literal_mapping in literal_mappings:
+        yield Target(
+            text=literal_mapping.text,
+            prefix=literal_mapping.reference.prefix,
+            identifier=literal_mapping.reference.identifier,
+            name=literal_mapping.name,
+        )
+
+
+def iter_gilda_targets() -> Iterator[Target]:
+    """Get targets from the terms in the default Gilda grounder."""
+    from .resolver import DbRefsResolver
+
+    grounder = ssslm.GildaGrounder.default()._grounder
+    terms = [term for terms in grounder.entries.values() for term in terms]
+    resolver = DbRefsResolver(sorted({term.db for term in terms}))
+    for term in tqdm(terms, desc="indexing Gilda terms", unit_scale=True, leave=False):
+        try:
+            prefix, identifier = resolver.normalize(term.db, term.id)
+        except ValueError:
+            continue
+        yield Target(text=term.text, prefix=prefix, identifier=identifier, name=term.entry_name)
+
+
+def iter_counts(path: str | Path, *, min_count: int = 1) -> Iterator[tuple[str, int]]:
+    """Stream (text, count) pairs from a counter file written by the INDRA workflow."""
+    with Path(path).open(newline="") as file:
+        reader = csv.reader(file, delimiter="\t")
+        next(reader)  # throw away header
+        for text, count_str in reader:
+            count = int(count_str)
+            if count < min_count:
+                # the file is sorted by descending count
+                break
+            yield text, count
+
+
+def mine(
+    counts: Iterable[tuple[str, int]],
+    *,
+    index: CandidateIndex | None = None,
+    min_score: float = 0.0,
+    max_workers: int | None = None,
+    chunksize: int = 10_000,
+) -> list[Suggestion]:
+    """Mine synonym suggestions for ungrounded text.
+
+    :param counts: Pairs of ungrounded text and the number of times they appeared,
+        e.g., from :func:`iter_counts`
+    :param index: An index of known synonyms. If not given, builds one from
+        the positive synonyms in Biosynonyms
+    :param min_score: The minimum score for a suggestion to be kept
+    :param max_workers: If given and larger than one, texts are scored in this
+        many worker processes, each holding a copy of the index
+    :param chunksize: The number of texts sent to a worker at a time
+    :returns: Suggestions, ranked by descending score then descending count. Texts
+        that are unentities, and suggestions that are already curated as positive or
+        negative synonyms, are removed.
+    """
+    if index is None:
+        index = CandidateIndex(iter_literal_mapping_targets(get_positive_synonyms()))
+
+    unentities = {text.casefold() for text in load_unentities()}
+    curated = {
+        (literal_mapping.text.casefold(), literal_mapping.curie)
+        for literal_mapping in [*get_positive_synonyms(), *get_negative_synonyms()]
+    }
+    counts = ((text, count) for text, count in counts if text and text.casefold() not in unentities)
+    groups = _iter_suggestion_groups(
+        counts, index=index, max_workers=max_workers, chunksize=chunksize
+    )
+    rv = [
+        suggestion
+        for group in tqdm(groups, desc="mining", unit="text", unit_scale=True)
+        for suggestion in group
+        if suggestion.score >= min_score
+        and (suggestion.text.casefold(), f"{suggestion.prefix}:{suggestion.identifier}")
+        not in curated
+    ]
+    rv.sort(key=lambda s: (-s.score, -s.frequency, s.text.casefold(), s.prefix, s.identifier))
+    return rv
+
+
+def _iter_suggestion_groups(
+    counts: Iterable[tuple[str, int]],
+    *,
+    index: CandidateIndex,
+    max_workers: int | None,
+    chunksize: int,
+) -> Iterator[list[Suggestion]]:
+    if max_workers is None or max_workers <= 1:
+        for text, count in counts:
+            yield index.suggest(text, count)
+    else:
+        with get_process_pool(max_workers, index) as executor:
+            yield from executor.map(call_in_worker(_suggest), counts, chunksize=chunksize)
+
+
+def write_suggestions(suggestions: Iterable[Suggestion], path: str | Path) -> None:
+    """Write suggestions in the same format as ``positives.tsv``."""
+    ssslm.write_literal_mappings(
+        (suggestion.to_literal_mapping() for suggestion in suggestions), path
+    )
+
+
+def _suggest(index: CandidateIndex, pair: tuple[str, int]) -> list[Suggestion]:
+    return index.suggest(*pair)
@@ -12,21 +12,23 @@ Run with ``python -m biosynonyms.predict``
 
 """
 
+import contextlib
 import gzip
+import hashlib
+import importlib.metadata
 import itertools as itt
 import json
 import logging
+import math
 from collections import Counter
-from collections.abc import Iterable
-from functools import partial
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from functools import lru_cache, partial
 from itertools import permutations
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, TypeVar
 
-import bioregistry
 import click
 import pandas as pd
-import pystow
 import ssslm
 from curies import ReferenceTuple
 from indra.assemblers.indranet.assembler import NS_PRIORITY_LIST
@@ -42,31 +44,59 @@ from more_click import force_option
 from tqdm import tqdm
 from tqdm.contrib.concurrent import process_map
 
+from biosynonyms.constants import (
+    COUNTER_PATH,
+    COUNTER_TOP_PATH,
+    DELTA_PATH,
+    EMBEDDINGS_PATH,
+    MODULE,
+    PAIRS_PATH,
+    PLOT_PATH,
+    PROFILE_DIRECTORY,
+    PROFILE_PATH,
+    PRUNED_PAIRS_PATH,
+    PRUNED_REPORT_PATH,
+    REPORT_PATH,
+    TEXT_PREFIX,
+)
+from biosynonyms.delta import DeltaStore
+from biosynonyms.instrumentation import RunReport, merge_profiles, profile_into
+from biosynonyms.prune import prune_pairs
+from biosynonyms.resolver import DbRefsResolver
 from biosynonyms.resources import load_unentities
+from biosynonyms.workers import call_in_worker, get_process_pool
 
 if TYPE_CHECKING:
     import ensmallen
 
 logger = logging.getLogger(__name__)
 
-MODULE = pystow.module("indra", "db")
-PAIRS_PATH = MODULE.join(name="biosynonyms_pairs.tsv")
-COUNTER_PATH = MODULE.join(name="biosynonyms_counter.tsv")
-COUNTER_TOP_PATH = MODULE.join(name="biosynonyms_counter_top_1000.tsv")
-EMBEDDINGS_PATH = MODULE.join(name="biosynonyms_embeddings.parquet")
-PLOT_PATH = MODULE.join(name="plot.png")
-TEXT_PREFIX = "text"
 
+#: The version of the INDRA dump used by default
+DUMP_VERSION = "2023-05-05"
+#: The number of lines from the INDRA dump that are processed together
+BATCH_SIZE = 10_000
+#: The number of worker processes used with ``multiprocessing``
+MAX_WORKERS = 4
+#: The number of statements in the INDRA dump, used for progress bars
+TOTAL_STATEMENTS = 65_102_088
+
+X = TypeVar("X")
+Y = TypeVar("Y")
 Row = tuple[ReferenceTuple, ReferenceTuple]
 Rows = list[Row]
 
 
-def ensure_procesed_statements() -> Path:
-    """Ensure the latest processed INDRA statements file is downloaded from S3."""
+def ensure_procesed_statements(version: str = DUMP_VERSION) -> Path:
+    """Ensure the processed INDRA statements file is downloaded from S3.
+
+    :param version: The date of the dump, e.g., ``2023-05-05``
+    :returns: The path to the gzipped processed statements file
+    """
     # s3://bigmech/indra-db/dumps/principal/2023-05-05/processed_statements.tsv.gz
     bucket = "bigmech"
-    key = "indra-db/dumps/principal/2023-05-05/processed_statements.tsv.gz"
-    return MODULE.ensure_from_s3("principal", "2023-05-05", s3_bucket=bucket, s3_key=key)
+    key = f"indra-db/dumps/principal/{version}/processed_statements.tsv.gz"
+    return MODULE.ensure_from_s3("principal", version, s3_bucket=bucket, s3_key=key)
 
 
 def norm(s: str) -> str:
@@ -74,52 +104,125 @@ def norm(s: str) -> str:
     return s.strip().replace("\t", " ").replace("\n", " ").replace("  ", " ")
 
 
-def get_agent_curie_tuple(agent: Agent, *, grounder: ssslm.Grounder) -> ReferenceTuple:
+@lru_cache(1)
+def get_resolver() -> DbRefsResolver:
+    """Get a resolver for INDRA db_refs, compiled once per process."""
+    return DbRefsResolver(NS_PRIORITY_LIST)
+
+
+def get_agent_curie_tuple(
+    agent: Agent,
+    *,
+    grounder: ssslm.Grounder,
+    resolver: DbRefsResolver | None = None,
+    report: RunReport | None = None,
+) -> ReferenceTuple:
     """Return a tuple of name space, id from an Agent's db_refs."""
-    for prefix in NS_PRIORITY_LIST:
-        if prefix in agent.db_refs:
-            return bioregistry.normalize_parsed_curie(prefix, agent.db_refs[prefix], strict=True)
+    if resolver is None:
+        resolver = get_resolver()
+    reference_tuple = resolver.resolve(agent.db_refs)
+    if reference_tuple is not None:
+        if report is not None:
+            report.increment("agents.db_refs")
+        return reference_tuple
 
     norm_agent_name = norm(agent.name)
     scored_match = grounder.get_best_match(norm_agent_name)
     if not scored_match:
+        if report is not None:
+            report.increment("agents.text")
         return ReferenceTuple(TEXT_PREFIX, norm_agent_name)
 
+    if report is not None:
+        report.increment("agents.grounder")
     return scored_match.reference.pair
 
 
 @click.command()
 @click.option("--size", type=int, default=32)
+@click.option("--profile", is_flag=True, help="Profile building the graph with cProfile")
+@click.option("--prune", is_flag=True, help="Prune the graph on disk before loading it")
+@click.option("--min-degree", type=int, default=1, show_default=True)
+@click.option("--max-degree", type=int, help="Remove hub nodes with a larger degree than this")
+@click.option("--min-text-count", type=int, default=2, show_default=True)
+@click.option("--dump", default=DUMP_VERSION, show_default=True, help="The INDRA dump version")
+@click.option(
+    "--delta",
+    is_flag=True,
+    help="Update the pairs from only the statements added or removed since the last dump "
+    "processed with --delta, then re-embed. This always runs, even if embeddings exist.",
+)
+@click.option(
+    "--rebuild",
+    is_flag=True,
+    help="With --delta, clear the store and process the whole dump, e.g., after the "
+    "grounder changes or unentities are removed",
+)
+@click.option("--multiprocessing", is_flag=True, help="Process statements in worker processes")
 @force_option
-def main(size: int, force: bool) -> None:
+def main(
+    size: int,
+    force: bool,
+    profile: bool,
+    prune: bool,
+    min_degree: int,
+    max_degree: int | None,
+    min_text_count: int,
+    dump: str,
+    delta: bool,
+    rebuild: bool,
+    multiprocessing: bool,
+) -> None:
     """Generate synonym predictions."""
-    if not EMBEDDINGS_PATH.is_file() or force:
-        graph = get_graph(force=force)
-        graph = graph.remove_disconnected_nodes()
-
-        from embiggen.embedders.ensmallen_embedders.second_order_line import (
-            SecondOrderLINEEnsmallen,
+    if rebuild and not delta:
+        raise click.UsageError("--rebuild can only be used with --delta")
+    if EMBEDDINGS_PATH.is_file() and not force and not delta:
+        click.echo(f"Embeddings already exist at {EMBEDDINGS_PATH}, use --force to rebuild")
+        return
+    if delta:
+        update_pairs(
+            version=dump, rebuild=rebuild, multiprocessing=multiprocessing, profile=profile
         )
+    else:
+        ensure_pairs(force=force, multiprocessing=multiprocessing, profile=profile, version=dump)
+    if prune:
+        click.echo(f"Pruning graph to {PRUNED_PAIRS_PATH}")
+        prune_pairs(
+            PAIRS_PATH,
+            PRUNED_PAIRS_PATH,
+            min_degree=min_degree,
+            max_degree=max_degree,
+            min_text_count=min_text_count,
+            report_path=PRUNED_REPORT_PATH,
+        )
+        graph = load_graph(PRUNED_PAIRS_PATH)
+    else:
+        graph = load_graph(PAIRS_PATH)
+    graph = graph.remove_disconnected_nodes()
+
+    from embiggen.embedders.ensmallen_embedders.second_order_line import (
+        SecondOrderLINEEnsmallen,
+    )
 
-        click.echo("Fitting Second Order LINE")
-        embedding = SecondOrderLINEEnsmallen(embedding_size=size).fit_transform(graph)
-        df: pd.DataFrame = embedding.get_all_node_embedding()[0].sort_index()
-        df.index.name = "node"
-        df.columns = [str(c) for c in df.columns]
-        click.echo(f"Writing Parquet to {EMBEDDINGS_PATH}")
-        df.to_parquet(EMBEDDINGS_PATH)
-        # TODO output index of all synonyms
-        # TODO calculate closest neighbors for synonyms
-        #  (that aren't already in predictions)
+    click.echo("Fitting Second Order LINE")
+    embedding = SecondOrderLINEEnsmallen(embedding_size=size).fit_transform(graph)
+    df: pd.DataFrame = embedding.get_all_node_embedding()[0].sort_index()
+    df.index.name = "node"
+    df.columns = [str(c) for c in df.columns]
+    click.echo(f"Writing Parquet to {EMBEDDINGS_PATH}")
+    df.to_parquet(EMBEDDINGS_PATH)
+    # TODO output index of all synonyms
+    # TODO calculate closest neighbors for synonyms
+    #  (that aren't already in predictions)
 
-        import matplotlib.pyplot as plt
-        from embiggen import GraphVisualizer
+    import matplotlib.pyplot as plt
+    from embiggen import GraphVisualizer
 
-        visualizer = GraphVisualizer(graph)
-        fig, _axes = visualizer.fit_and_plot_all(embedding)
-        click.echo(f"Outputting plots to {PLOT_PATH}")
-        plt.savefig(PLOT_PATH, dpi=300)
-        plt.close(fig)
+    visualizer = GraphVisualizer(graph)
+    fig, _axes = visualizer.fit_and_plot_all(embedding)
+    click.echo(f"Outputting plots to {PLOT_PATH}")
+    plt.savefig(PLOT_PATH, dpi=300)
+    plt.close(fig)
 
 
 def get_grounder() -> ssslm.Grounder:
@@ -127,54 +230,110 @@ def get_grounder() -> ssslm.Grounder:
     return ssslm.GildaGrounder.default()
 
 
-def get_graph(force: bool = False, *, multiprocessing: bool = False) -> "ensmallen.Graph":
-    """Get an undirected INDRA graph."""
+def get_graph(
+    force: bool = False, *, multiprocessing: bool = False, profile: bool = False
+) -> "ensmallen.Graph":
+    """Get an undirected INDRA graph.
+
+    :param force: Should the pairs file be rebuilt, even if it already exists?
+    :param multiprocessing: Should statements be processed in worker processes?
+    :param profile: Should processing statements be profiled with :mod:`cProfile`?
+    :returns: A graph loaded from the pairs file
+    """
+    ensure_pairs(force=force, multiprocessing=multiprocessing, profile=profile)
+    return load_graph(PAIRS_PATH)
+
+
+def ensure_pairs(
+    force: bool = False,
+    *,
+    multiprocessing: bool = False,
+    profile: bool = False,
+    version: str = DUMP_VERSION,
+) -> Path:
+    """Build the INDRA pairs file, if it doesn't already exist.
+
+    :param force: Should the pairs file be rebuilt, even if it already exists?
+    :param multiprocessing: Should statements be processed in worker processes?
+    :param profile: Should processing statements be profiled with :mod:`cProfile`?
+        If so, stats from all processes are merged into :data:`PROFILE_PATH`.
+    :param version: The version of the INDRA dump to use
+    :returns: The path to the pairs file
+
+    When building the pairs file, a JSON report with cumulative per-stage
+    timers, counters, and peak memory usage is written to :data:`REPORT_PATH`.
+    """
     if not PAIRS_PATH.exists() or force:
+        report = RunReport()
+
         click.echo("loading non-entities")
-        unentities = load_unentities()
+        with report.stage("load_unentities"):
+            unentities = load_unentities()
 
         click.echo("Get grounder")
-        grounder = get_grounder()
-
-        func = partial(_line_to_rows, unentities=unentities, grounder=grounder)
+        with report.stage("load_grounder"):
+            grounder = get_grounder()
+
+        if profile:
+            for path in PROFILE_DIRECTORY.glob("*.prof"):
+                path.unlink()
+
+        func = partial(
+            _lines_to_rows,
+            unentities=unentities,
+            grounder=grounder,
+            resolver=get_resolver(),
+            profile_directory=PROFILE_DIRECTORY if profile else None,
+        )
 
         click.echo("Ensuring INDRA statements from S3")
-        input_path = ensure_procesed_statements()
+        input_path = ensure_procesed_statements(version)
         tqdm_kwargs = {
             "desc": "loading INDRA db",
-            "unit": "statement",
             "unit_scale": True,
-            "total": 65_102_088,
         }
         click.echo("Reading INDRA statements")
+        rows: set[Row] = set()
         with gzip.open(input_path, "rt") as file:
             click.echo(f"Opened {file.name}")
+            lines = report.iter_timed("read", file)
 
+            results: Iterable[tuple[Rows, RunReport]]
             if multiprocessing:
-                groups = process_map(
+                results = process_map(
                     func,
-                    file,
+                    _iter_batches(lines, BATCH_SIZE),
                     **tqdm_kwargs,
-                    max_workers=4,
-                    chunksize=300_000,
+                    unit="batch",
+                    total=math.ceil(TOTAL_STATEMENTS / BATCH_SIZE),
+                    max_workers=MAX_WORKERS,
+                    # the function (including the grounder) is pickled once per
+                    # chunk, so keep chunks around 300K statements
+                    chunksize=30,
                 )
-                rows: set[Row] = set(itt.chain.from_iterable(groups))
             else:
-                rows = set(
-                    itt.chain.from_iterable(func(line) for line in tqdm(file, **tqdm_kwargs))
-                )
+                lines = tqdm(lines, **tqdm_kwargs, unit="statement", total=TOTAL_STATEMENTS)
+                results = (func(batch) for batch in _iter_batches(lines, BATCH_SIZE))
 
-        sorted_rows = sorted(rows)
+            for batch_rows, batch_report in results:
+                report.update(batch_report)
+                with report.stage("deduplicate"):
+                    rows.update(batch_rows)
+
+        with report.stage("sort"):
+            sorted_rows = sorted(rows)
+        report.increment("rows.unique", len(sorted_rows))
 
         click.echo("Tabulating entity counts")
-        counter = Counter(_iter_names_from_rows(sorted_rows))
-        counter_df = pd.DataFrame(counter.most_common(), columns=["synonym", "count"])
-        counter_df.to_csv(COUNTER_PATH, sep="\t", index=False)
-        counter_df.head(1000).to_csv(COUNTER_TOP_PATH, sep="\t", index=False)
+        with report.stage("count"):
+            counter = Counter(_iter_names_from_rows(sorted_rows))
+            counter_df = pd.DataFrame(counter.most_common(), columns=["synonym", "count"])
+            counter_df.to_csv(COUNTER_PATH, sep="\t", index=False)
+            counter_df.head(1000).to_csv(COUNTER_TOP_PATH, sep="\t", index=False)
 
         click.echo(f"Writing graph to {PAIRS_PATH}")
         # this can't be gzipped or else GRAPE doesn't work
-        with PAIRS_PATH.open("w") as file:
+        with report.stage("write"), PAIRS_PATH.open("w") as file:
             for source, target in tqdm(sorted_rows, desc="writing", unit_scale=True):
                 print(
                     source.curie,
@@ -183,11 +342,142 @@ def get_graph(force: bool = False, *, multiprocessing: bool = False) -> "ensmall
                     file=file,
                 )
 
+        click.echo(f"Writing run report to {REPORT_PATH}")
+        report.write(REPORT_PATH)
+        if profile:
+            click.echo(f"Writing merged profile to {PROFILE_PATH}")
+            merge_profiles(PROFILE_DIRECTORY, PROFILE_PATH)
+
+    return PAIRS_PATH
+
+
+def update_pairs(
+    version: str = DUMP_VERSION,
+    *,
+    rebuild: bool = False,
+    multiprocessing: bool = False,
+    profile: bool = False,
+) -> Path:
+    """Update the INDRA pairs file to match a dump, only processing what changed.
+
+    :param version: The version of the INDRA dump to use
+    :param rebuild: Should the store be rebuilt from scratch? This is required
+        when the grounder changes or unentities are removed.
+    :param multiprocessing: Should statements be processed in worker processes?
+    :param profile: Should processing statements be profiled with :mod:`cProfile`?
+        If so, stats from all processes are merged into :data:`PROFILE_PATH`.
+    :returns: The path to the pairs file
+
+    Processed statement hashes and the edges they contribute are kept in
+    :data:`DELTA_PATH` (see :class:`biosynonyms.delta.DeltaStore`). The first
+    run processes the whole dump. Later runs with a newer dump only process
+    statements that were added and subtract the edges from statements that
+    were removed, then rewrite the pairs and counter files from the store.
+    """
+    fingerprint = get_grounding_fingerprint()
+    report = RunReport(parameters={"version": version, "fingerprint": fingerprint})
+    with report.stage("load_unentities"):
+        unentities = load_unentities()
+    with report.stage("load_grounder"):
+        grounder = get_grounder()
+
+    if profile:
+        for path in PROFILE_DIRECTORY.glob("*.prof"):
+            path.unlink()
+
+    func = partial(
+        _process_bodies,
+        unentities=unentities,
+        grounder=grounder,
+        resolver=get_resolver(),
+        profile_directory=PROFILE_DIRECTORY if profile else None,
+    )
+
+    input_path = ensure_procesed_statements(version)
+    store = DeltaStore(DELTA_PATH)
+    with contextlib.ExitStack() as stack:
+        stack.callback(store.close)
+        if multiprocessing:
+            executor = stack.enter_context(get_process_pool(MAX_WORKERS, func))
+
+            def _process(bodies: Sequence[str]) -> list[Rows]:
+                # split each batch evenly across the workers, which each hold a copy of func
+                size = math.ceil(len(bodies) / MAX_WORKERS)
+                chunks = [bodies[i : i + size] for i in range(0, len(bodies), size)]
+                rv: list[Rows] = []
+                for rows_per_body, batch_report in executor.map(call_in_worker(_call), chunks):
+                    report.update(batch_report)
+                    rv.extend(rows_per_body)
+                return rv
+
+        else:
+
+            def _process(bodies: Sequence[str]) -> list[Rows]:
+                rows_per_body, batch_report = func(bodies)
+                report.update(batch_report)
+                return rows_per_body
+
+        click.echo(f"Updating {DELTA_PATH} from {input_path}")
+        with gzip.open(input_path, "rt") as file:
+            lines = tqdm(
+                report.iter_timed("read", file),
+                desc="loading INDRA db",
+                unit="statement",
+                unit_scale=True,
+                total=TOTAL_STATEMENTS,
+            )
+            store.update(
+                lines,
+                _process,
+                fingerprint=fingerprint,
+                unentities=unentities,
+                rebuild=rebuild,
+                batch_size=BATCH_SIZE,
+                report=report,
+            )
+
+        click.echo("Tabulating entity counts")
+        with report.stage("count"):
+            store.write_counter(COUNTER_PATH, top_path=COUNTER_TOP_PATH)
+        click.echo(f"Writing graph to {PAIRS_PATH}")
+        with report.stage("write"):
+            store.write_pairs(PAIRS_PATH)
+
+    click.echo(f"Writing run report to {REPORT_PATH}")
+    report.write(REPORT_PATH)
+    if profile:
+        click.echo(f"Writing merged profile to {PROFILE_PATH}")
+        merge_profiles(PROFILE_DIRECTORY, PROFILE_PATH)
+    return PAIRS_PATH
+
+
+def get_grounding_fingerprint() -> str:
+    """Get a fingerprint of everything that determines how agents are grounded."""
+    data = {
+        # gilda can be installed either as gilda or gilda-slim
+        "packages": {
+            name: _get_package_version(name)
+            for name in ("bioregistry", "gilda", "gilda-slim", "indra", "ssslm")
+        },
+        "namespaces": NS_PRIORITY_LIST,
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _get_package_version(name: str) -> str | None:
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def load_graph(path: Path) -> "ensmallen.Graph":
+    """Load a directed graph from a tab-separated pairs file."""
     from ensmallen import Graph
 
-    click.echo(f"Loading graph from {PAIRS_PATH}")
+    click.echo(f"Loading graph from {path}")
     return Graph.from_csv(
-        edge_path=str(PAIRS_PATH),
+        edge_path=str(path),
         edge_list_separator="\t",
         sources_column_number=0,
         destinations_column_number=1,
@@ -207,24 +497,157 @@ def _iter_names_from_rows(sorted_rows: Iterable[Row]) -> Iterable[str]:
             yield target.identifier
 
 
-def _line_to_rows(line: str, unentities: set[str], grounder: ssslm.Grounder) -> Rows:
-    _assembled_hash, stmt_json_str = line.split("\t", 1)
-    # why won't it strip the extra?!?!
-    stmt_json_str = stmt_json_str.replace('""', '"').strip('"')[:-2]
-    stmt = Statement._from_json(json.loads(stmt_json_str))
-    return _rows_from_stmt(stmt, unentities=unentities, grounder=grounder)
+def _iter_batches(lines: Iterable[str], size: int) -> Iterator[list[str]]:
+    iterator = iter(lines)
+    while batch := list(itt.islice(iterator, size)):
+        yield batch
+
+
+def _lines_to_rows(
+    lines: list[str],
+    *,
+    unentities: set[str],
+    grounder: ssslm.Grounder,
+    resolver: DbRefsResolver,
+    profile_directory: Path | None = None,
+) -> tuple[Rows, RunReport]:
+    """Process a batch of lines, returning a report so this can be run in a worker process.
+
+    Each phase (decoding JSON, building statements, grounding, and filtering
+    unentities) is timed once over the whole batch rather than per statement,
+    since timers around each statement would cost more than some of the steps
+    they measure.
+    """
+    bodies = [line.split("\t", 1)[1] for line in lines]
+    rows_per_body, report = _process_bodies(
+        bodies,
+        unentities=unentities,
+        grounder=grounder,
+        resolver=resolver,
+        profile_directory=profile_directory,
+    )
+    return [row for rows in rows_per_body for row in rows], report
+
+
+def _process_bodies(
+    bodies: Sequence[str],
+    *,
+    unentities: set[str],
+    grounder: ssslm.Grounder,
+    resolver: DbRefsResolver,
+    profile_directory: Path | None = None,
+) -> tuple[list[Rows], RunReport]:
+    """Process lines whose assembled hashes were removed, keeping rows for each line."""
+    report = RunReport()
+    func = partial(
+        _bodies_to_rows, unentities=unentities, grounder=grounder, resolver=resolver, report=report
+    )
+    if profile_directory is None:
+        rows_per_body = func(bodies)
+    else:
+        with profile_into(profile_directory):
+            rows_per_body = func(bodies)
+    return rows_per_body, report
+
+
+def _call(func: Callable[[X], Y], arg: X) -> Y:
+    return func(arg)
+
+
+def _bodies_to_rows(
+    bodies: Sequence[str],
+    *,
+    unentities: set[str],
+    grounder: ssslm.Grounder,
+    resolver: DbRefsResolver,
+    report: RunReport,
+) -> list[Rows]:
+    with report.stage("decode_json"):
+        # why won't it strip the extra?!?!
+        stmt_jsons = [json.loads(body.replace('""', '"').strip('"')[:-2]) for body in bodies]
+    with report.stage("from_json"):
+        stmts = [Statement._from_json(stmt_json) for stmt_json in stmt_jsons]
+    return _stmts_to_rows(
+        stmts, unentities=unentities, grounder=grounder, resolver=resolver, report=report
+    )
+
+
+def _stmts_to_rows(
+    stmts: Sequence[Statement],
+    *,
+    unentities: set[str],
+    grounder: ssslm.Grounder,
+    resolver: DbRefsResolver,
+    report: RunReport,
+    complex_members: int = 3,
+) -> list[Rows]:
+    with report.stage("get_agent_pairs"):
+        agent_pairs = [
+            _get_agent_pairs(stmt, report=report, complex_members=complex_members) for stmt in stmts
+        ]
+
+    with report.stage("ground"):
+        grounded_rows = [
+            [
+                (
+                    get_agent_curie_tuple(
+                        agent_a, grounder=grounder, resolver=resolver, report=report
+                    ),
+                    get_agent_curie_tuple(
+                        agent_b, grounder=grounder, resolver=resolver, report=report
+                    ),
+                )
+                for agent_a, agent_b in pairs
+            ]
+            for pairs in agent_pairs
+        ]
+
+    def _is_unentity(r: ReferenceTuple) -> bool:
+        return r.prefix == TEXT_PREFIX and r.identifier in unentities
+
+    with report.stage("filter_unentities"):
+        rv = [
+            [
+                (source, target)
+                for source, target in rows
+                if not _is_unentity(source) and not _is_unentity(target)
+            ]
+            for rows in grounded_rows
+        ]
+    report.increment(
+        "rows.dropped_unentity",
+        sum(len(rows) for rows in grounded_rows) - sum(len(rows) for rows in rv),
+    )
+    return rv
 
 
-def _rows_from_stmt(  # noqa:C901
+def _rows_from_stmt(
     stmt: Statement,
     *,
     unentities: set[str],
     grounder: ssslm.Grounder,
+    resolver: DbRefsResolver,
+    report: RunReport,
     complex_members: int = 3,
 ) -> Rows:
+    return _stmts_to_rows(
+        [stmt],
+        unentities=unentities,
+        grounder=grounder,
+        resolver=resolver,
+        report=report,
+        complex_members=complex_members,
+    )[0]
+
+
+def _get_agent_pairs(  # noqa:C901
+    stmt: Statement, *, report: RunReport, complex_members: int = 3
+) -> list[tuple[Agent, Agent]]:
+    report.increment(f"statements.{type(stmt).__name__}")
     not_none_agents = stmt.real_agent_list()
     if len(not_none_agents) < 2:
         # Exclude statements with less than 2 agents
+        report.increment("statements.skipped_too_few_agents")
         return []
 
     if isinstance(stmt, Influence | Association):
@@ -247,6 +670,7 @@ def _rows_from_stmt(  # noqa:C901
         # Do not add complexes with more members than complex_members
         if len(not_none_agents) > complex_members:
             logger.debug(f"Skipping a complex with {len(not_none_agents)} members.")
+            report.increment("complexes.skipped_size")
             return []
         else:
             # add every permutation with a neutral polarity
@@ -262,25 +686,12 @@ def _rows_from_stmt(  # noqa:C901
         # This is for any remaining statement type that may not be
         # handled above explicitly but somehow has more than two
         # not-none-agents at this point
+        report.increment("statements.skipped_too_many_agents")
         return []
     else:
         edges = [(not_none_agents[0], not_none_agents[1], None)]
 
-    def _is_unentity(r: ReferenceTuple) -> bool:
-        return r.prefix == TEXT_PREFIX and r.identifier in unentities
-
-    rows = []
-    for agent_a, agent_b, _sign in edges:
-        if agent_a.name == agent_b.name:
-            continue
-        source = get_agent_curie_tuple(agent_a, grounder=grounder)
-        target = get_agent_curie_tuple(agent_b, grounder=grounder)
-        if _is_unentity(source) or _is_unentity(target):
-            continue
-
-        row = (source, target)
-        rows.append(row)
-    return rows
+    return [(agent_a, agent_b) for agent_a, agent_b, _sign in edges if agent_a.name != agent_b.name]
 
 
 # TODO open up pairs file and clean it to remove any row where
@@ -0,0 +1,246 @@
+"""Streaming degree filtering for the INDRA pairs graph before embedding.
+
+Loading the full pairs file into :mod:`ensmallen` before removing anything
+means hub nodes with enormous degree and ``text:`` nodes that were only seen
+once still inflate memory and embedding time. This module prunes the edge list
+on disk in two streaming passes:
+
+1. count the degree of each node in a :class:`DegreeTable`. This is the only
+   table that's kept in memory. It's keyed by 64-bit hashes of the nodes rather
+   than the node strings themselves, so it takes a fixed 13 bytes per distinct
+   node (plus two more bytes while pruning), regardless of how long the
+   ``text:`` nodes are.
+2. write each edge unless one of its nodes is below the minimum degree, above
+   the hub cap, or is a ``text:`` node seen fewer than the minimum number of
+   times (i.e., the count in :data:`biosynonyms.constants.COUNTER_PATH`).
+
+Both passes read the file in chunks of lines so the counting and lookups are
+vectorized with :mod:`numpy`.
+
+Run with ``python -m biosynonyms.predict --prune``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from tqdm import tqdm
+
+from .constants import TEXT_PREFIX
+from .instrumentation import RunReport
+
+if TYPE_CHECKING:
+    import numpy as np
+
+__all__ = [
+    "DegreeTable",
+    "count_degrees",
+    "prune_pairs",
+]
+
+TEXT_CURIE_PREFIX = f"{TEXT_PREFIX}:"
+
+#: The number of lines read from a pairs file at a time
+CHUNK_SIZE = 1_000_000
+
+#: Reasons for dropping a node, indexed by the codes used while pruning, where
+#: zero means the node is kept. Lower codes take precedence.
+REASONS = (None, "low_degree", "hub", "rare_text")
+
+
+class DegreeTable:
+    """Node degrees, keyed by 64-bit hashes of the nodes in sorted arrays.
+
+    Nodes are hashed with :func:`hash`, which is salted per process, so a table
+    can only be used in the process that built it. The chance that any two of
+    :math:`n` nodes collide is about :math:`n^2 / 2^{65}`, i.e., negligible for
+    the hundreds of millions of nodes in the INDRA pairs graph.
+    """
+
+    def __init__(self, keys: np.ndarray, degrees: np.ndarray, is_text: np.ndarray) -> None:
+        """Wrap arrays describing the nodes.
+
+        :param keys: The sorted, unique hashes of the nodes
+        :param degrees: The degree of each node
+        :param is_text: If each node is a ``text:`` node
+        """
+        self.keys = keys
+        self.degrees = degrees
+        self.is_text = is_text
+
+    @classmethod
+    def from_pairs(cls, path: str | Path, *, chunk_size: int = CHUNK_SIZE) -> DegreeTable:
+        """Count the (undirected) degree of each node in a tab-separated pairs file.
+
+        :param path: A tab-separated pairs file
+        :param chunk_size: The number of lines to read at a time
+        :returns: A table of degrees
+        """
+        import numpy as np
+
+        table = cls(np.empty(0, np.int64), np.empty(0, np.uint32), np.empty(0, np.bool_))
+        buffer: list[tuple[np.ndarray, np.ndarray]] = []
+        buffered = 0
+        with Path(path).open() as file:
+            for sources, targets in tqdm(
+                _iter_chunks(file, chunk_size), desc="counting degrees", unit="chunk"
+            ):
+                nodes = sources + targets
+                buffer.append((_hash_nodes(nodes), _is_text(nodes)))
+                buffered += len(nodes)
+                # merge into the table once the buffer is as big as the table, so
+                # the table is re-sorted a logarithmic number of times in total
+                if buffered >= max(len(table), chunk_size):
+                    table = table._merge(buffer)
+                    buffer, buffered = [], 0
+        return table._merge(buffer)
+
+    def _merge(self, buffer: list[tuple[np.ndarray, np.ndarray]]) -> DegreeTable:
+        """Add an occurrence of each buffered node."""
+        import numpy as np
+
+        if not buffer:
+            return self
+        new_keys, new_is_text = zip(*buffer, strict=True)
+        n_new = sum(len(keys) for keys in new_keys)
+        keys, inverse = np.unique(np.concatenate([self.keys, *new_keys]), return_inverse=True)
+        weights = np.concatenate([self.degrees, np.ones(n_new, np.uint32)])
+        degrees = np.bincount(inverse, weights=weights, minlength=len(keys)).astype(np.uint32)
+        is_text = np.zeros(len(keys), np.bool_)
+        is_text[inverse[np.concatenate([self.is_text, *new_is_text])]] = True
+        return DegreeTable(keys, degrees, is_text)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __getitem__(self, node: str) -> int:
+        """Get the degree of a node, or zero if it's not in the table."""
+        import numpy as np
+
+        key = hash(node)
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and self.keys[position] == key:
+            return int(self.degrees[position])
+        return 0
+
+    def locate(self, nodes: list[str]) -> np.ndarray:
+        """Get the positions of nodes in the table, assuming they're all in it."""
+        import numpy as np
+
+        return np.searchsorted(self.keys, _hash_nodes(nodes))
+
+
+def _iter_chunks(file: Iterator[str], chunk_size: int) -> Iterator[tuple[list[str], list[str]]]:
+    """Iterate over the sources and targets in chunks of lines from a pairs file."""
+    while lines := list(islice(file, chunk_size)):
+        sources, targets = [], []
+        for line in lines:
+            source, target = line.rstrip("\n").split("\t")
+            sources.append(source)
+            targets.append(target)
+        yield sources, targets
+
+
+def _hash_nodes(nodes: list[str]) -> np.ndarray:
+    import numpy as np
+
+    return np.fromiter(map(hash, nodes), dtype=np.int64, count=len(nodes))
+
+
+def _is_text(nodes: list[str]) -> np.ndarray:
+    import numpy as np
+
+    return np.fromiter(
+        (node.startswith(TEXT_CURIE_PREFIX) for node in nodes), dtype=np.bool_, count=len(nodes)
+    )
+
+
+def count_degrees(path: str | Path) -> DegreeTable:
+    """Count the (undirected) degree of each node in a tab-separated pairs file."""
+    return DegreeTable.from_pairs(path)
+
+
+def prune_pairs(
+    input_path: str | Path,
+    output_path: str | Path,
+    *,
+    min_degree: int = 1,
+    max_degree: int | None = None,
+    min_text_count: int = 2,
+    report_path: str | Path | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> RunReport:
+    """Write a pruned copy of a pairs file.
+
+    :param input_path: A tab-separated pairs file, e.g., :data:`biosynonyms.constants.PAIRS_PATH`
+    :param output_path: The path to write the pruned pairs file
+    :param min_degree: Remove edges touching nodes with a smaller degree than this
+    :param max_degree: Remove edges touching nodes with a larger degree than this
+        (i.e., hubs). If not given, hubs are kept.
+    :param min_text_count: Remove edges touching ``text:`` nodes that appear fewer
+        than this many times
+    :param report_path: If given, write the report as JSON to this path
+    :param chunk_size: The number of lines to read at a time
+    :returns: A report with the number of nodes and edges that were kept and dropped
+    """
+    import numpy as np
+
+    report = RunReport(
+        parameters={
+            "min_degree": min_degree,
+            "max_degree": max_degree,
+            "min_text_count": min_text_count,
+        }
+    )
+    with report.stage("count_degrees"):
+        table = DegreeTable.from_pairs(input_path, chunk_size=chunk_size)
+
+    with report.stage("classify_nodes"):
+        # assign codes from the lowest to the highest precedence, so later
+        # assignments win when a node has several reasons to be dropped
+        codes = np.zeros(len(table), np.uint8)
+        codes[table.is_text & (table.degrees < min_text_count)] = REASONS.index("rare_text")
+        if max_degree is not None:
+            codes[table.degrees > max_degree] = REASONS.index("hub")
+        codes[table.degrees < min_degree] = REASONS.index("low_degree")
+    report.increment("nodes.total", len(table))
+    _count_reasons(report, "nodes", np.bincount(codes, minlength=len(REASONS)))
+
+    written = np.zeros(len(table), np.bool_)
+    edge_totals = np.zeros(len(REASONS), np.int64)
+    with (
+        report.stage("write"),
+        Path(input_path).open() as input_file,
+        Path(output_path).open("w") as output_file,
+    ):
+        for sources, targets in tqdm(
+            _iter_chunks(input_file, chunk_size), desc="pruning", unit="chunk"
+        ):
+            source_positions, target_positions = table.locate(sources), table.locate(targets)
+            source_codes = codes[source_positions]
+            chunk_codes = np.where(source_codes > 0, source_codes, codes[target_positions])
+            edge_totals += np.bincount(chunk_codes, minlength=len(REASONS))
+            kept = np.flatnonzero(chunk_codes == 0)
+            output_file.writelines(f"{sources[i]}\t{targets[i]}\n" for i in kept)
+            written[source_positions[kept]] = True
+            written[target_positions[kept]] = True
+    report.increment("edges.total", int(edge_totals.sum()))
+    _count_reasons(report, "edges", edge_totals)
+    # nodes that are kept but whose only neighbors were all dropped are left out
+    report.increment("nodes.written", int(written.sum()))
+
+    if report_path is not None:
+        report.write(report_path)
+    return report
+
+
+def _count_reasons(report: RunReport, prefix: str, totals: np.ndarray) -> None:
+    """Count how many were kept and how many were dropped for each reason code."""
+    for reason, total in zip(REASONS, totals.tolist(), strict=True):
+        if reason is None:
+            report.increment(f"{prefix}.kept", total)
+        elif total:
+            report.increment(f"{prefix}.dropped_{reason}", total)
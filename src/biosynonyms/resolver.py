@@ -0,0 +1,112 @@
+"""A compiled resolver for normalizing database cross-references.
+
+Calling :func:`bioregistry.normalize_parsed_curie` for every agent in a large
+corpus repeats prefix resolution and resource lookup each time. The
+:class:`DbRefsResolver` does this work once for a fixed list of namespaces and
+memoizes the results, while giving exactly the same output.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+import bioregistry
+from curies import ReferenceTuple
+
+__all__ = [
+    "DbRefsResolver",
+]
+
+#: A rule is a casefolded string to match at the start of an identifier
+#: and the number of characters to remove if it matches
+Rule = tuple[str, int]
+
+
+class DbRefsResolver:
+    """Normalize (namespace, identifier) pairs with precompiled Bioregistry rules.
+
+    >>> resolver = DbRefsResolver(["HGNC", "CHEBI"])
+    >>> resolver.resolve({"CHEBI": "CHEBI:15377", "TEXT": "water"})
+    ReferenceTuple(prefix='chebi', identifier='15377')
+
+    The memo is not pickled, so sending a resolver to worker processes is cheap.
+    """
+
+    def __init__(self, namespaces: Iterable[str], *, max_cache_size: int = 1_000_000) -> None:
+        """Initialize the resolver.
+
+        :param namespaces: The namespaces to check, in priority order, e.g.,
+            :data:`indra.assemblers.indranet.assembler.NS_PRIORITY_LIST`
+        :param max_cache_size: The maximum number of (namespace, identifier) pairs to
+            memoize. When full, the oldest entries are evicted first.
+        """
+        self.namespaces = tuple(namespaces)
+        self.max_cache_size = max_cache_size
+        self._prefixes: dict[str, str] = {}
+        self._rules: dict[str, tuple[Rule, ...]] = {}
+        for namespace in self.namespaces:
+            prefix = bioregistry.normalize_prefix(namespace)
+            if prefix is None:
+                # these are left for bioregistry to raise the appropriate error
+                continue
+            resource = bioregistry.get_resource(prefix)
+            if resource is None:  # pragma: no cover
+                continue
+            self._prefixes[namespace] = prefix
+            self._rules[namespace] = _compile_rules(resource)
+        self._cache: dict[tuple[str, str], ReferenceTuple] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_cache"] = {}
+        return state
+
+    def resolve(self, db_refs: Mapping[str, str]) -> ReferenceTuple | None:
+        """Normalize the highest priority cross-reference, if any are available."""
+        for namespace in self.namespaces:
+            if namespace in db_refs:
+                return self.normalize(namespace, db_refs[namespace])
+        return None
+
+    def normalize(self, namespace: str, identifier: str) -> ReferenceTuple:
+        """Normalize a namespace/identifier pair.
+
+        :param namespace: The namespace, which must be one of the resolver's namespaces
+        :param identifier: The identifier, possibly with a redundant prefix or banana
+        :returns: The same as ``bioregistry.normalize_parsed_curie(namespace, identifier,
+            strict=True)``
+        """
+        key = namespace, identifier
+        rv = self._cache.get(key)
+        if rv is not None:
+            return rv
+        prefix = self._prefixes.get(namespace)
+        if prefix is None:
+            # raises a PrefixStandardizationError
+            return bioregistry.normalize_parsed_curie(namespace, identifier, strict=True)
+        rv = ReferenceTuple(prefix, _standardize_identifier(identifier, self._rules[namespace]))
+        if len(self._cache) >= self.max_cache_size:
+            del self._cache[next(iter(self._cache))]
+        self._cache[key] = rv
+        return rv
+
+
+def _compile_rules(resource: bioregistry.Resource) -> tuple[Rule, ...]:
+    """Compile the checks done by :meth:`bioregistry.Resource.standardize_identifier`."""
+    banana = resource.get_banana()
+    rules: list[Rule] = []
+    for peel in [resource.get_banana_peel(), "_"]:
+        if banana:
+            prebanana = f"{banana}{peel}".casefold()
+            rules.append((prebanana, len(prebanana)))
+        rules.append((f"{resource.prefix.casefold()}{peel}", len(resource.prefix) + len(peel)))
+    return tuple(rules)
+
+
+def _standardize_identifier(identifier: str, rules: Iterable[Rule]) -> str:
+    icf = identifier.casefold()
+    for start, length in rules:
+        if icf.startswith(start):
+            return identifier[length:]
+    return identifier
@@ -0,0 +1,396 @@
+"""A micro-batching grounding server.
+
+Grounders aren't thread-safe, so a naive web service can only handle one
+lookup at a time. This server keeps a single grounder loaded and combines
+concurrent requests into micro-batches, collected within a small latency
+window, which are then grounded in a thread (or in a pool of worker processes,
+each with its own grounder) without blocking the event loop. Identical texts
+within a batch are only grounded once.
+
+The protocol is JSON lines over TCP. Each request is a JSON object on its own
+line with a ``text`` and an optional ``id``, which is echoed in the response,
+since responses on the same connection might be written out of order:
+
+.. code-block:: console
+
+    $ python -m biosynonyms serve --port 8765 &
+    $ echo '{"id": 1, "text": "YAL021C"}' | nc localhost 8765
+    {"id": 1, "matches": [{"reference": {"prefix": "sgd", ...}, "score": 0.5555}]}
+
+Sending ``{"stats": true}`` returns the throughput and latency histograms.
+
+Each connection can only have a limited number of requests in flight. After
+that, the server stops reading from the connection until some are answered,
+so a client that writes faster than the grounder can keep up gets backpressure
+through TCP rather than an ever-growing queue on the server. Lines longer than
+:data:`MAX_LINE_BYTES` get an error response, and then the connection is closed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+import ssslm
+
+from .workers import call_in_worker, get_process_pool
+
+__all__ = [
+    "MicroBatcher",
+    "ServerMetrics",
+    "run_server",
+    "start_server",
+]
+
+logger = logging.getLogger(__name__)
+
+#: JSON-serializable matches for a single text
+Matches = list[dict[str, Any]]
+#: A function that grounds several texts at a time
+BatchFunc = Callable[[Sequence[str]], list[Matches]]
+
+#: Upper bounds (in milliseconds) for the latency histogram
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+#: The maximum length of a request line, in bytes
+MAX_LINE_BYTES = 2**16
+#: The default maximum number of requests in flight for each connection
+MAX_PENDING = 256
+
+#: Upper bounds for the batch size histogram
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+@dataclass
+class ServerMetrics:
+    """Throughput and latency histograms for the grounding server."""
+
+    start: float = field(default_factory=time.monotonic)
+    requests: int = 0
+    batches: int = 0
+    latency_counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    batch_size_counts: list[int] = field(
+        default_factory=lambda: [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+    )
+
+    def observe_latency(self, seconds: float) -> None:
+        """Record the latency for a single request."""
+        self.requests += 1
+        self.latency_counts[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+
+    def observe_batch(self, size: int) -> None:
+        """Record the size of a batch."""
+        self.batches += 1
+        self.batch_size_counts[bisect.bisect_left(BATCH_SIZE_BUCKETS, size)] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get a JSON-serializable summary."""
+        uptime = time.monotonic() - self.start
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "requests": self.requests,
+            "batches": self.batches,
+            "qps": round(self.requests / uptime, 3) if uptime else 0.0,
+            "latency_ms": _histogram(LATENCY_BUCKETS_MS, self.latency_counts),
+            "batch_size": _histogram(BATCH_SIZE_BUCKETS, self.batch_size_counts),
+        }
+
+
+def _histogram(buckets: Sequence[int], counts: Sequence[int]) -> dict[str, int]:
+    rv = {f"<={bucket}": count for bucket, count in zip(buckets, counts, strict=False)}
+    rv[f">{buckets[-1]}"] = counts[-1]
+    return rv
+
+
+class MicroBatcher:
+    """Combines concurrent grounding requests into batches."""
+
+    def __init__(
+        self,
+        func: BatchFunc,
+        executor: Executor,
+        *,
+        max_batch_size: int = 64,
+        max_wait: float = 0.002,
+        concurrency: int = 1,
+    ) -> None:
+        """Initialize the batcher.
+
+        :param func: A function that grounds a batch of texts. This gets run in the executor.
+        :param executor: The executor for running batches. This should only have a single
+            thread if the function uses a shared grounder.
+        :param max_batch_size: The maximum number of texts in a batch
+        :param max_wait: The maximum number of seconds to wait after the first request in
+            a batch for more to arrive
+        :param concurrency: The maximum number of batches in flight at the same time.
+            This should match the number of workers in the executor.
+        """
+        self.func = func
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = ServerMetrics()
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future[Matches]]] = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._loop_task: asyncio.Task[None] | None = None
+
+    @classmethod
+    def from_grounder(cls, grounder: ssslm.Grounder, **kwargs: Any) -> MicroBatcher:
+        """Create a batcher that runs a single shared grounder in a background thread."""
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grounder")
+        return cls(partial(ground_texts, grounder), executor, concurrency=1, **kwargs)
+
+    @classmethod
+    def from_grounder_factory(
+        cls, factory: Callable[[], ssslm.Grounder], *, processes: int, **kwargs: Any
+    ) -> MicroBatcher:
+        """Create a batcher that runs batches in worker processes, each with its own grounder.
+
+        :param factory: A picklable function that builds a grounder, e.g.,
+            :func:`biosynonyms.make_grounder`
+        :param processes: The number of worker processes
+        :param kwargs: Keyword arguments passed to :class:`MicroBatcher`
+        :returns: A micro-batcher
+        """
+        executor = get_process_pool(processes, factory=factory)
+        return cls(call_in_worker(ground_texts), executor, concurrency=processes, **kwargs)
+
+    def start(self) -> None:
+        """Start the background task that collects and dispatches batches."""
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop collecting batches, wait for in-flight batches, and shut down the executor.
+
+        Requests that are still waiting to be batched fail with a :class:`RuntimeError`.
+        """
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        stopped = RuntimeError("the batcher was stopped")
+        while not self._queue.empty():
+            _fail([self._queue.get_nowait()], stopped)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.executor.shutdown()
+
+    async def ground(self, text: str) -> Matches:
+        """Ground a text, waiting for it to be processed as part of a batch."""
+        if self._loop_task is None:
+            raise RuntimeError("the batcher isn't running")
+        start = time.monotonic()
+        future: asyncio.Future[Matches] = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        try:
+            return await future
+        finally:
+            self.metrics.observe_latency(time.monotonic() - start)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.max_wait
+                self._drain(batch)
+                if len(batch) < self.max_batch_size and (remaining := deadline - loop.time()) > 0:
+                    # give concurrent requests a moment to arrive, then take what's there
+                    await asyncio.sleep(remaining)
+                    self._drain(batch)
+                await self._semaphore.acquire()
+            except asyncio.CancelledError:
+                # the batcher was stopped before this batch could be dispatched
+                _fail(batch, RuntimeError("the batcher was stopped"))
+                raise
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _drain(self, batch: list[tuple[str, asyncio.Future[Matches]]]) -> None:
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    async def _dispatch(self, batch: list[tuple[str, asyncio.Future[Matches]]]) -> None:
+        try:
+            self.metrics.observe_batch(len(batch))
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(self.executor, self.func, texts)
+            except Exception as e:  # noqa:BLE001 - errors are passed on to the requests
+                _fail(batch, e)
+                return
+            text_to_matches = dict(zip(texts, results, strict=True))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(text_to_matches[text])
+        finally:
+            self._semaphore.release()
+
+
+def _fail(batch: list[tuple[str, asyncio.Future[Matches]]], exception: BaseException) -> None:
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(exception)
+
+
+def ground_texts(grounder: ssslm.Grounder, texts: Sequence[str]) -> list[Matches]:
+    """Ground several texts, returning JSON-serializable matches."""
+    return [
+        [match.model_dump(mode="json", exclude_none=True) for match in grounder.get_matches(text)]
+        for text in texts
+    ]
+
+
+async def _handle_request(batcher: MicroBatcher, line: bytes) -> dict[str, Any]:
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError:
+        return {"error": "invalid JSON"}
+    if not isinstance(request, dict):
+        return {"error": "request must be a JSON object"}
+    if request.get("stats"):
+        return batcher.metrics.to_dict()
+    text = request.get("text")
+    if not isinstance(text, str):
+        return {"id": request.get("id"), "error": "missing text"}
+    try:
+        matches = await batcher.ground(text)
+    except Exception as e:
+        logger.exception("failed to ground %r", text)
+        return {"id": request.get("id"), "error": str(e)}
+    return {"id": request.get("id"), "matches": matches}
+
+
+async def _handle_connection(
+    batcher: MicroBatcher,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    *,
+    max_pending: int = MAX_PENDING,
+) -> None:
+    lock = asyncio.Lock()
+    pending = asyncio.Semaphore(max_pending)
+    tasks: set[asyncio.Task[None]] = set()
+
+    async def _write(response: dict[str, Any]) -> None:
+        async with lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def _respond(line: bytes) -> None:
+        try:
+            await _write(await _handle_request(batcher, line))
+        finally:
+            pending.release()
+
+    try:
+        while True:
+            # stop reading while too many requests are in flight, so the client's
+            # writes back up instead of the server queueing without bound
+            await pending.acquire()
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # the line is longer than the stream's limit. The rest of it can't
+                # be told apart from the next request, so give up on the connection
+                pending.release()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await _write({"error": f"request is longer than {MAX_LINE_BYTES} bytes"})
+                break
+            if not line:
+                pending.release()
+                break
+            if not line.strip():
+                pending.release()
+                continue
+            # handle each line concurrently so they can be batched together
+            task = asyncio.create_task(_respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        # only left over if something went wrong, e.g., the client disconnected,
+        # and they must not write to the writer after it's closed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        writer.close()
+        await writer.wait_closed()
+
+
+async def start_server(
+    batcher: MicroBatcher,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    max_pending: int = MAX_PENDING,
+) -> asyncio.Server:
+    """Start the batcher and a JSON lines server for it.
+
+    :param batcher: The micro-batcher
+    :param host: The host to bind
+    :param port: The port to bind. Use 0 to pick a free port.
+    :param max_pending: The maximum number of requests in flight for each connection
+    :returns: The running server. Remember to call :meth:`MicroBatcher.stop` after closing it.
+    """
+    batcher.start()
+    return await asyncio.start_server(
+        partial(_handle_connection, batcher, max_pending=max_pending),
+        host=host,
+        port=port,
+        limit=MAX_LINE_BYTES,
+    )
+
+
+def run_server(
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    processes: int | None = None,
+    max_batch_size: int = 64,
+    max_wait: float = 0.002,
+    max_pending: int = MAX_PENDING,
+) -> None:
+    """Serve the Biosynonyms grounder until interrupted.
+
+    :param host: The host to bind
+    :param port: The port to bind
+    :param processes: If given, ground batches in this many worker processes, each with
+        their own grounder. Otherwise, a single grounder is used in a background thread.
+    :param max_batch_size: The maximum number of texts in a batch
+    :param max_wait: The maximum number of seconds to wait for a batch to fill
+    :param max_pending: The maximum number of requests in flight for each connection
+    """
+    from .resources import make_grounder
+
+    async def _main() -> None:
+        if processes:
+            batcher = MicroBatcher.from_grounder_factory(
+                make_grounder, processes=processes, max_batch_size=max_batch_size, max_wait=max_wait
+            )
+        else:
+            batcher = MicroBatcher.from_grounder(
+                make_grounder(), max_batch_size=max_batch_size, max_wait=max_wait
+            )
+        server = await start_server(batcher, host=host, port=port, max_pending=max_pending)
+        logger.info("serving on %s:%d", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await batcher.stop()
+
+    asyncio.run(_main())
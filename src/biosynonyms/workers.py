@@ -0,0 +1,75 @@
+"""Process pools whose workers each hold one large object, like an index or a grounder.
+
+Passing a large object as an argument to every task means pickling it over and
+over. Instead, :func:`get_process_pool` sends it (or a function that builds it)
+to each worker once, when the worker starts, and :func:`call_in_worker` wraps a
+function so its first argument is filled in with the worker's object.
+
+.. code-block:: python
+
+    from biosynonyms.approximate import ApproximateIndex
+    from biosynonyms.workers import call_in_worker, get_process_pool
+
+    index = ApproximateIndex.default()
+    with get_process_pool(4, index) as executor:
+        results = list(executor.map(call_in_worker(ApproximateIndex.search), texts))
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, TypeVar
+
+__all__ = [
+    "call_in_worker",
+    "get_process_pool",
+]
+
+R = TypeVar("R")
+
+#: The object held by the current worker process
+_WORKER_OBJECT: Any = None
+
+
+def get_process_pool(
+    max_workers: int,
+    obj: Any = None,
+    *,
+    factory: Callable[[], Any] | None = None,
+) -> ProcessPoolExecutor:
+    """Get a process pool in which each worker holds an object.
+
+    :param max_workers: The number of worker processes
+    :param obj: The object, which is pickled once for each worker
+    :param factory: A picklable function that builds the object in each worker
+        instead, e.g., when the object itself can't be pickled
+    :returns: A process pool, to be used with :func:`call_in_worker`
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_initialize_worker, initargs=(obj, factory)
+    )
+
+
+def call_in_worker(func: Callable[..., R], **kwargs: Any) -> Callable[..., R]:
+    """Wrap a function to be called with the worker's object as its first argument.
+
+    :param func: A picklable function (e.g., defined at the module level, or a
+        method like ``ApproximateIndex.search``) whose first argument is the object
+        given to :func:`get_process_pool`
+    :param kwargs: Additional keyword arguments to pass to the function
+    :returns: A picklable function that takes the remaining arguments
+    """
+    return partial(_call, func, **kwargs)
+
+
+def _initialize_worker(obj: Any, factory: Callable[[], Any] | None) -> None:
+    global _WORKER_OBJECT
+    _WORKER_OBJECT = factory() if factory is not None else obj
+
+
+def _call(func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    if _WORKER_OBJECT is None:  # pragma: no cover
+        raise RuntimeError("worker was not initialized")
+    return func(_WORKER_OBJECT, *args, **kwargs)
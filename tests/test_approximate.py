@@ -0,0 +1,46 @@
+"""Tests for the approximate synonym index."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from biosynonyms.approximate import ApproximateIndex
+
+
+class TestApproximateIndex(unittest.TestCase):
+    """Test the approximate synonym index."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Build the index once."""
+        cls.index = ApproximateIndex.default()
+
+    def test_search(self) -> None:
+        """Test typo-tolerant search."""
+        for text, distance in [("YAL021C", 0), ("yal021c", 0), ("YAL02C", 1), ("YAL0X1D", 2)]:
+            with self.subTest(text=text):
+                results = self.index.search(text)
+                self.assertEqual(1, len(results))
+                self.assertEqual("sgd:S000000019", results[0].literal_mapping.curie)
+                self.assertEqual(distance, results[0].distance)
+
+        self.assertEqual([], self.index.search("YAL0X1D", max_distance=1))
+        self.assertEqual([], self.index.search("completely unrelated"))
+        with self.assertRaises(ValueError):
+            self.index.search("YAL021C", max_distance=3)
+
+    def test_batch(self) -> None:
+        """Test serial and parallel batch search give the same results."""
+        texts = ["YAL02C", "neuroinflamation", "nothing"]
+        serial = self.index.search_batch(texts)
+        self.assertEqual([1, 1, 0], [len(results) for results in serial])
+        parallel = self.index.search_batch(texts, max_workers=2, chunksize=1)
+        self.assertEqual(serial, parallel)
+
+    def test_save_load(self) -> None:
+        """Test saving and loading the index."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("index.json.gz")
+            self.index.save(path)
+            reloaded = ApproximateIndex.load(path)
+        self.assertEqual(self.index.search("ATPas"), reloaded.search("ATPas"))
@@ -0,0 +1,130 @@
+"""Tests for cross-checking synonyms against external dumps."""
+
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from curies import NamedReference
+from ssslm import LiteralMapping
+
+from biosynonyms import crosscheck
+from biosynonyms.crosscheck import Finding, SynonymKeyIndex, cross_check, iter_pairs
+
+TSV = """\
+text\tcurie\tname
+Abema\tmesh:C000590451\tabemaciclib
+abema\tmesh:C000590451\tabemaciclib
+
+abema\tMESH:C000590451\tabemaciclib
+short
+Tasmanian devil\tncbitaxon:9305\tSarcophilus harrisii
+unrelated\tmesh:C000000001\tunrelated
+"""
+
+OBO = """\
+format-version: 1.2
+
+[Term]
+id: GO:0000001
+name: mitochondrion inheritance
+synonym: "Bone" RELATED []
+synonym: "the \\"CRISPR\\" thing" EXACT []
+
+[Typedef]
+id: part_of
+name: bone
+"""
+
+
+def _literal_mapping(text: str, curie: str) -> LiteralMapping:
+    return LiteralMapping(text=text, reference=NamedReference.from_curie(curie, name=text))
+
+
+class TestCrossCheck(unittest.TestCase):
+    """Test cross-checking synonyms against external dumps."""
+
+    def setUp(self) -> None:
+        """Set up an index and external files."""
+        self.index = SynonymKeyIndex(
+            positives=[_literal_mapping("abema", "mesh:C000590451")],
+            negatives=[_literal_mapping("Tasmanian devil", "ncbitaxon:9305")],
+            unentities=["bone"],
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.tsv_path = Path(self.directory.name).joinpath("external.tsv")
+        self.tsv_path.write_text(TSV)
+        self.obo_path = Path(self.directory.name).joinpath("external.obo.gz")
+        with gzip.open(self.obo_path, "wt") as file:
+            file.write(OBO)
+
+    def tearDown(self) -> None:
+        """Clean up the external files."""
+        self.directory.cleanup()
+
+    def test_iter_tsv(self) -> None:
+        """Test streaming pairs from an ssslm TSV file, with CURIEs as written."""
+        self.assertEqual(
+            [
+                ("Abema", "mesh:C000590451"),
+                ("abema", "mesh:C000590451"),
+                ("abema", "MESH:C000590451"),
+                ("Tasmanian devil", "ncbitaxon:9305"),
+                ("unrelated", "mesh:C000000001"),
+            ],
+            list(iter_pairs(self.tsv_path)),
+        )
+
+    def test_normalize_on_hit(self) -> None:
+        """Test that only the CURIEs of external texts that hit the index are normalized."""
+        with mock.patch.object(
+            crosscheck, "_normalize_curie", wraps=crosscheck._normalize_curie
+        ) as normalize_curie:
+            self.index.check_file(self.tsv_path)
+        self.assertNotIn(mock.call("mesh:C000000001"), normalize_curie.call_args_list)
+        normalize_curie.assert_any_call("MESH:C000590451")
+
+    def test_iter_obo(self) -> None:
+        """Test streaming names and synonyms from an OBO file, skipping typedefs."""
+        self.assertEqual(
+            [
+                ("mitochondrion inheritance", "GO:0000001"),
+                ("Bone", "GO:0000001"),
+                ('the "CRISPR" thing', "GO:0000001"),
+            ],
+            list(iter_pairs(self.obo_path)),
+        )
+
+    def test_cross_check(self) -> None:
+        """Test finding duplicates, negatives, and unentities, in parallel."""
+        tsv, obo = str(self.tsv_path), str(self.obo_path)
+        expected = [
+            Finding(
+                tsv,
+                "duplicate",
+                "casefold",
+                "abema",
+                "mesh:C000590451",
+                "Abema",
+                "mesh:C000590451",
+                1,
+            ),
+            Finding(
+                tsv, "duplicate", "exact", "abema", "mesh:C000590451", "abema", "mesh:C000590451", 2
+            ),
+            Finding(
+                tsv,
+                "negative",
+                "exact",
+                "Tasmanian devil",
+                "ncbitaxon:9305",
+                "Tasmanian devil",
+                "ncbitaxon:9305",
+                1,
+            ),
+            Finding(obo, "unentity", "casefold", "bone", "", "Bone", "go:0000001", 1),
+        ]
+        paths = [self.tsv_path, self.obo_path]
+        self.assertEqual(expected, cross_check(paths, index=self.index))
+        self.assertEqual(expected, cross_check(paths, index=self.index, max_workers=2))
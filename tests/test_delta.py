@@ -0,0 +1,143 @@
+"""Tests for incrementally updating the pairs graph between dumps."""
+
+import tempfile
+import unittest
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from curies import ReferenceTuple
+
+from biosynonyms.delta import DeltaStore, Row
+
+
+def _process(bodies: Sequence[str]) -> list[list[Row]]:
+    """Process fake statements, where each body is a space-separated list of CURIEs."""
+    rv = []
+    for body in bodies:
+        references = [ReferenceTuple.from_curie(curie) for curie in body.split()]
+        rv.append(
+            [(source, target) for source in references for target in references if source != target]
+        )
+    return rv
+
+
+class TestDelta(unittest.TestCase):
+    """Test incrementally updating the pairs graph."""
+
+    def setUp(self) -> None:
+        """Set up a temporary store."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        self.store = DeltaStore(self.path.joinpath("delta.sqlite"))
+        self.processed: list[str] = []
+
+    def tearDown(self) -> None:
+        """Close the temporary store."""
+        self.store.close()
+        self.directory.cleanup()
+
+    def _update(self, lines: list[str], **kwargs: Any) -> dict[str, int]:
+        def _process_recorded(bodies: Sequence[str]) -> list[list[Row]]:
+            self.processed.extend(bodies)
+            return _process(bodies)
+
+        self.processed.clear()
+        report = self.store.update(lines, _process_recorded, batch_size=2, **kwargs)
+        return dict(report.counters)
+
+    def test_update(self) -> None:
+        """Test adding and removing statements between dumps."""
+        counters = self._update(
+            [
+                "1\thgnc:1 text:a",
+                "2\thgnc:1 text:a",
+                "3\thgnc:2 text:b",
+                # the same hash appearing again in a dump is skipped
+                "1\thgnc:1 text:a",
+            ]
+        )
+        self.assertEqual(3, len(self.store))
+        self.assertEqual(3, counters["statements.added"])
+        self.assertEqual(4, counters["edges.added"])
+        self.assertEqual([("a", 2), ("b", 2)], self.store.get_text_counts())
+
+        counters = self._update(["2\thgnc:1 text:a", "4\thgnc:1 text:b"])
+        self.assertEqual(["hgnc:1 text:b"], self.processed, msg="unchanged statement reprocessed")
+        self.assertEqual(1, counters["statements.added"])
+        self.assertEqual(1, counters["statements.unchanged"])
+        self.assertEqual(2, counters["statements.removed"])
+        # statement 1 is removed, but its edges are still supported by statement 2
+        self.assertEqual(2, counters["edges.added"])
+        self.assertEqual(2, counters["edges.removed"])
+        self.assertEqual([("a", 2), ("b", 2)], self.store.get_text_counts())
+
+        pairs_path = self.path.joinpath("pairs.tsv")
+        self.store.write_pairs(pairs_path)
+        self.assertEqual(
+            [
+                "hgnc:1\ttext:a",
+                "hgnc:1\ttext:b",
+                "text:a\thgnc:1",
+                "text:b\thgnc:1",
+            ],
+            pairs_path.read_text().splitlines(),
+        )
+
+        counter_path = self.path.joinpath("counter.tsv")
+        self.store.write_counter(counter_path)
+        self.assertEqual(["synonym\tcount", "a\t2", "b\t2"], counter_path.read_text().splitlines())
+
+    def test_reopen(self) -> None:
+        """Test that the store is persisted between sessions."""
+        self._update(["1\thgnc:1 text:a"])
+        self.store.close()
+        self.store = DeltaStore(self.path.joinpath("delta.sqlite"))
+        counters = self._update(["1\thgnc:1 text:a"])
+        self.assertEqual([], self.processed)
+        self.assertEqual(1, counters["statements.unchanged"])
+        self.assertEqual(1, len(self.store))
+
+    def test_unentities(self) -> None:
+        """Test that unentities added after building the store are filtered when writing."""
+        self._update(["1\thgnc:1 text:a", "2\thgnc:1 text:b"], unentities={"c"})
+        self._update(["1\thgnc:1 text:a", "2\thgnc:1 text:b"], unentities={"b", "c"})
+        self.assertEqual([], self.processed)
+        self.assertEqual([("a", 2)], self.store.get_text_counts())
+        hgnc, text = ReferenceTuple("hgnc", "1"), ReferenceTuple("text", "a")
+        self.assertEqual([(hgnc, text), (text, hgnc)], list(self.store.iter_rows()))
+
+        # removing an unentity can't be done incrementally
+        with self.assertRaises(ValueError):
+            self._update(["1\thgnc:1 text:a"], unentities={"b"})
+        counters = self._update(["1\thgnc:1 text:a"], unentities={"b"}, rebuild=True)
+        self.assertEqual(1, counters["statements.added"])
+        self.assertEqual({"b"}, self.store.get_unentities())
+
+    def test_fingerprint(self) -> None:
+        """Test that a store built with a different grounder isn't updated."""
+        self._update(["1\thgnc:1 text:a"], fingerprint="v1")
+        with self.assertRaises(ValueError):
+            self._update(["1\thgnc:1 text:a"], fingerprint="v2")
+        self._update(["1\thgnc:1 text:a"], fingerprint="v2", rebuild=True)
+        self.assertEqual("v2", self.store.get_fingerprint())
+        self.assertEqual(["hgnc:1 text:a"], self.processed)
+
+    def test_resume(self) -> None:
+        """Test that progress before an interruption is kept."""
+        lines = [f"{i}\thgnc:{i} text:a" for i in range(1, 7)]
+
+        def _process_interrupted(bodies: Sequence[str]) -> list[list[Row]]:
+            if "hgnc:5 text:a" in bodies:
+                raise KeyboardInterrupt
+            return _process(bodies)
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.store.update(lines, _process_interrupted, batch_size=2, commit_every=1)
+        self.store.close()
+
+        self.store = DeltaStore(self.path.joinpath("delta.sqlite"))
+        self.assertEqual(4, len(self.store))
+        counters = self._update(lines)
+        self.assertEqual(["hgnc:5 text:a", "hgnc:6 text:a"], self.processed)
+        self.assertEqual(4, counters["statements.unchanged"])
@@ -0,0 +1,68 @@
+"""Tests for frozen synonym tables."""
+
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import biosynonyms
+from biosynonyms.frozen import MAGIC, FrozenSynonyms, freeze, freeze_to_bytes
+
+
+def _get_curies(args: tuple[str, str]) -> list[str]:
+    path, text = args
+    return FrozenSynonyms.open(path).get_curies(text)
+
+
+class TestFrozen(unittest.TestCase):
+    """Test frozen synonym tables."""
+
+    def test_accessors(self) -> None:
+        """Test the frozen accessors match the regular ones."""
+        frozen = FrozenSynonyms(freeze_to_bytes())
+        self.assertEqual(biosynonyms.get_positive_synonyms(), frozen.get_positive_synonyms())
+        self.assertEqual(biosynonyms.get_negative_synonyms(), frozen.get_negative_synonyms())
+
+    def test_lookup(self) -> None:
+        """Test case-insensitive lookup."""
+        frozen = FrozenSynonyms(freeze_to_bytes())
+        self.assertEqual(["sgd:S000000019"], frozen.get_curies("yal021c"))
+        self.assertEqual(
+            ["ec:3.6.1.3", "hgnc.genegroup:412"],
+            sorted(literal_mapping.curie for literal_mapping in frozen.lookup("ATPASE")),
+        )
+        self.assertEqual(
+            ["hgnc:22979"], [lm.curie for lm in frozen.lookup_negatives("PI(3,4,5)P3")]
+        )
+        self.assertEqual([], frozen.lookup("nope"))
+
+    def test_invalid(self) -> None:
+        """Test attaching to an invalid buffer."""
+        with self.assertRaises(ValueError):
+            FrozenSynonyms(b"\0" * 64)
+
+    def test_short(self) -> None:
+        """Test attaching to buffers that are too short, or truncated."""
+        for buffer in [b"", MAGIC]:
+            with self.subTest(buffer=buffer), self.assertRaises(ValueError):
+                FrozenSynonyms(buffer)
+        data = freeze_to_bytes()
+        with self.assertRaises(ValueError):
+            FrozenSynonyms(data[: len(data) // 2])
+
+    def test_version(self) -> None:
+        """Test attaching to a buffer frozen with an older layout."""
+        data = freeze_to_bytes()
+        with self.assertRaisesRegex(ValueError, "version 1"):
+            FrozenSynonyms(b"BSYNFRZ1" + data[len(MAGIC) :])
+
+    def test_workers(self) -> None:
+        """Test worker processes can attach to the same memory-mapped file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("biosynonyms.frozen")
+            freeze(path)
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                results = list(
+                    executor.map(_get_curies, [(str(path), "YAL021C"), (str(path), "ydl160c")])
+                )
+        self.assertEqual([["sgd:S000000019"], ["sgd:S000002319"]], results)
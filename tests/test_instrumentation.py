@@ -0,0 +1,41 @@
+"""Tests for run instrumentation."""
+
+import json
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+
+from biosynonyms.instrumentation import RunReport
+
+
+class TestRunReport(unittest.TestCase):
+    """Test the run report."""
+
+    def test_merge(self) -> None:
+        """Test combining reports, e.g., from worker processes."""
+        parent = RunReport()
+        with parent.stage("read"):
+            pass
+        parent.increment("agents.text")
+
+        worker = RunReport()
+        worker.increment("agents.text", 2)
+        worker.increment("agents.db_refs")
+        list(worker.iter_timed("decode_json", range(3)))
+        worker = pickle.loads(pickle.dumps(worker))  # noqa:S301
+
+        parent.update(worker)
+        self.assertEqual({"agents.text": 3, "agents.db_refs": 1}, dict(parent.counters))
+        self.assertEqual({"read", "decode_json"}, set(parent.timers))
+
+    def test_write(self) -> None:
+        """Test writing a JSON report."""
+        report = RunReport()
+        report.increment("statements.Complex")
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("report.json")
+            report.write(path)
+            data = json.loads(path.read_text())
+        self.assertEqual({"statements.Complex": 1}, data["counters"])
+        self.assertIn("peak_rss_mb", data)
@@ -0,0 +1,67 @@
+"""Tests for mining candidate synonyms."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import ssslm
+
+from biosynonyms.mine import CandidateIndex, Target, iter_counts, mine, write_suggestions
+
+TARGETS = [
+    Target("tumor necrosis factor", "hgnc", "11892", "TNF"),
+    Target("TNF-alpha", "hgnc", "11892", "TNF"),
+    Target("neuroinflammation", "hp", "0033429", "Neuroinflammation"),
+    Target("ATPase", "ec", "3.6.1.3", "adenosinetriphosphatase"),
+    Target("Bone", "uberon", "0001474", "bone element"),
+    Target("ER", "go", "0005783", "endoplasmic reticulum"),
+    Target("Cl", "chebi", "29311", "chloride"),
+]
+
+
+class TestMine(unittest.TestCase):
+    """Test mining candidate synonyms."""
+
+    def test_suggest(self) -> None:
+        """Test generating candidates with each blocking method."""
+        index = CandidateIndex(TARGETS)
+        for text, curie, method in [
+            ("TNF alpha", "hgnc:11892", "key"),
+            ("Neuro-Inflammation", "hp:0033429", "key"),
+            ("factor necrosis tumor", "hgnc:11892", "tokens"),
+            ("TNF", "hgnc:11892", "acronym"),
+            ("endoplasmic reticulum", "go:0005783", "acronym"),
+        ]:
+            with self.subTest(text=text):
+                suggestions = index.suggest(text, 5)
+                self.assertEqual(1, len(suggestions))
+                suggestion = suggestions[0]
+                self.assertEqual(curie, f"{suggestion.prefix}:{suggestion.identifier}")
+                self.assertEqual(method, suggestion.method)
+                self.assertEqual(5, suggestion.frequency)
+        self.assertEqual([], index.suggest("unrelated"))
+        # the initials match, but "Cl" doesn't look like an acronym
+        self.assertEqual([], index.suggest("cell line"))
+
+    def test_mine(self) -> None:
+        """Test mining from a counter file, filtering curated synonyms and unentities."""
+        with tempfile.TemporaryDirectory() as directory:
+            counter_path = Path(directory).joinpath("counter.tsv")
+            counter_path.write_text(
+                "synonym\tcount\n"
+                "neuro-inflammation\t30\n"
+                "neuroinflammation\t20\n"  # already curated
+                "bone\t10\n"  # an unentity
+                "Tumor Necrosis Factor\t5\n"
+                "atpase\t1\n"  # below minimum count
+            )
+            index = CandidateIndex(TARGETS)
+            suggestions = mine(iter_counts(counter_path, min_count=2), index=index)
+            self.assertEqual(
+                ["neuro-inflammation", "Tumor Necrosis Factor"], [s.text for s in suggestions]
+            )
+
+            output_path = Path(directory).joinpath("output.tsv")
+            write_suggestions(suggestions, output_path)
+            literal_mappings = ssslm.read_literal_mappings(output_path)
+        self.assertEqual("hp:0033429", literal_mappings[0].curie)
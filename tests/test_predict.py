@@ -0,0 +1,141 @@
+"""Tests for converting INDRA statements into pairs."""
+
+import gzip
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+from curies import ReferenceTuple
+
+from biosynonyms.resolver import DbRefsResolver
+
+HAS_INDRA = importlib.util.find_spec("indra") is not None
+
+#: A sample of INDRA namespaces, in priority order
+NAMESPACES = ["FPLX", "HGNC", "UP", "CHEBI", "GO", "MESH", "HMDB", "PUBCHEM"]
+
+
+class StubGrounder:
+    """A grounder that only knows about TNF."""
+
+    def get_best_match(self, text: str) -> Any:
+        """Get a match for TNF, or nothing."""
+        if text == "TNF":
+            return SimpleNamespace(reference=SimpleNamespace(pair=ReferenceTuple("hgnc", "11892")))
+        return None
+
+
+def _to_line(assembled_hash: int, stmt: Any) -> str:
+    """Format a statement like a line in the processed statements dump."""
+    stmt_json = json.dumps(stmt.to_json()).replace('"', '""')
+    return f'{assembled_hash}\t"{stmt_json}"\n'
+
+
+@unittest.skipUnless(HAS_INDRA, "indra is not installed")
+class TestPredict(unittest.TestCase):
+    """Test converting INDRA statements into pairs."""
+
+    def test_lines_to_rows(self) -> None:
+        """Test processing a batch of lines, with counters for each outcome."""
+        from indra.statements import Activation, Agent, Complex, Phosphorylation
+
+        from biosynonyms.predict import _lines_to_rows
+
+        statements = [
+            Activation(
+                Agent("MEK1", db_refs={"HGNC": "6840"}), Agent("ERK2", db_refs={"HGNC": "6871"})
+            ),
+            # TNF is grounded, but bone is an unentity
+            Activation(Agent("TNF"), Agent("bone")),
+            Complex([Agent("A"), Agent("B"), Agent("C"), Agent("D")]),
+            Phosphorylation(None, Agent("MEK1", db_refs={"HGNC": "6840"})),
+        ]
+        lines = [_to_line(i, stmt) for i, stmt in enumerate(statements)]
+        rows, report = _lines_to_rows(
+            lines,
+            unentities={"bone"},
+            grounder=StubGrounder(),  # type:ignore[arg-type]
+            resolver=DbRefsResolver(NAMESPACES),
+        )
+        self.assertEqual([(ReferenceTuple("hgnc", "6840"), ReferenceTuple("hgnc", "6871"))], rows)
+        self.assertEqual(
+            {
+                "statements.Activation": 2,
+                "statements.Complex": 1,
+                "statements.Phosphorylation": 1,
+                "statements.skipped_too_few_agents": 1,
+                "complexes.skipped_size": 1,
+                "agents.db_refs": 2,
+                "agents.grounder": 1,
+                "agents.text": 1,
+                "rows.dropped_unentity": 1,
+            },
+            dict(report.counters),
+        )
+        self.assertLessEqual(
+            {"decode_json", "from_json", "ground", "filter_unentities"}, set(report.timers)
+        )
+
+    def test_rows_from_stmt(self) -> None:
+        """Test that complexes are only expanded up to the maximum size."""
+        from indra.statements import Agent, Complex
+
+        from biosynonyms.instrumentation import RunReport
+        from biosynonyms.predict import _rows_from_stmt
+
+        stmt = Complex([Agent("A"), Agent("B"), Agent("C")])
+        kwargs: dict[str, Any] = {
+            "unentities": set(),
+            "grounder": StubGrounder(),
+            "resolver": DbRefsResolver(NAMESPACES),
+        }
+        report = RunReport()
+        rows = _rows_from_stmt(stmt, report=report, **kwargs)
+        self.assertEqual(6, len(rows))
+        self.assertEqual(12, report.counters["agents.text"])
+
+        report = RunReport()
+        self.assertEqual([], _rows_from_stmt(stmt, report=report, complex_members=2, **kwargs))
+        self.assertEqual(1, report.counters["complexes.skipped_size"])
+
+    def test_update_pairs(self) -> None:
+        """Test building pairs incrementally, in a single process and in worker processes."""
+        from indra.statements import Activation, Agent
+
+        from biosynonyms import predict
+
+        statements = [
+            Activation(Agent("MEK1", db_refs={"HGNC": "6840"}), Agent("TNF")),
+            Activation(Agent("TNF"), Agent("bone")),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory)
+            dump_path = path.joinpath("processed_statements.tsv.gz")
+            with gzip.open(dump_path, "wt") as file:
+                file.writelines(_to_line(i, stmt) for i, stmt in enumerate(statements))
+            patches = [
+                mock.patch.object(predict, "ensure_procesed_statements", return_value=dump_path),
+                mock.patch.object(predict, "get_grounder", return_value=StubGrounder()),
+                mock.patch.object(predict, "load_unentities", return_value={"bone"}),
+                mock.patch.object(predict, "get_resolver", return_value=DbRefsResolver(NAMESPACES)),
+            ]
+            for name in ["DELTA_PATH", "PAIRS_PATH", "COUNTER_PATH", "COUNTER_TOP_PATH"]:
+                patches.append(mock.patch.object(predict, name, path.joinpath(name)))
+            patches.append(mock.patch.object(predict, "REPORT_PATH", path.joinpath("report.json")))
+            for patch in patches:
+                patch.start()
+                self.addCleanup(patch.stop)
+
+            for multiprocessing in [False, True]:
+                with self.subTest(multiprocessing=multiprocessing):
+                    pairs_path = predict.update_pairs(rebuild=True, multiprocessing=multiprocessing)
+                    self.assertEqual("hgnc:6840\thgnc:11892\n", pairs_path.read_text())
+                    report = json.loads(path.joinpath("report.json").read_text())
+                    self.assertEqual(2, report["counters"]["statements.added"])
+                    self.assertEqual(1, report["counters"]["rows.dropped_unentity"])
+                    self.assertIn("ground", report["timers"])
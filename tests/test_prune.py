@@ -0,0 +1,86 @@
+"""Tests for pruning the pairs graph."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+from biosynonyms.prune import DegreeTable, count_degrees, prune_pairs
+
+PAIRS = [
+    ("hgnc:1", "hgnc:2"),
+    ("hgnc:1", "hgnc:3"),
+    ("hgnc:1", "hgnc:4"),
+    ("hgnc:1", "hgnc:5"),
+    ("hgnc:2", "hgnc:3"),
+    ("hgnc:2", "text:seen once"),
+    ("hgnc:3", "text:seen twice"),
+    ("hgnc:4", "text:seen twice"),
+]
+
+
+class TestPrune(unittest.TestCase):
+    """Test pruning the pairs graph."""
+
+    def test_prune(self) -> None:
+        """Test removing hubs, low degree nodes, and rare text."""
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = Path(directory).joinpath("pairs.tsv")
+            input_path.write_text("".join(f"{s}\t{t}\n" for s, t in PAIRS))
+            output_path = Path(directory).joinpath("pruned.tsv")
+            report_path = Path(directory).joinpath("report.json")
+
+            self.assertEqual(4, count_degrees(input_path)["hgnc:1"])
+
+            prune_pairs(
+                input_path,
+                output_path,
+                min_degree=2,
+                max_degree=3,
+                min_text_count=2,
+                report_path=report_path,
+            )
+            pruned = [tuple(line.split("\t")) for line in output_path.read_text().splitlines()]
+            report = json.loads(report_path.read_text())
+
+            text_report = prune_pairs(input_path, output_path, min_text_count=3)
+
+        self.assertEqual(
+            [
+                ("hgnc:2", "hgnc:3"),
+                ("hgnc:3", "text:seen twice"),
+                ("hgnc:4", "text:seen twice"),
+            ],
+            pruned,
+        )
+        counters = report["counters"]
+        self.assertEqual(8, counters["edges.total"])
+        self.assertEqual(3, counters["edges.kept"])
+        self.assertEqual(4, counters["nodes.written"])
+        self.assertEqual(4, counters["edges.dropped_hub"])
+        self.assertEqual(2, counters["nodes.dropped_low_degree"])
+        self.assertNotIn("nodes.dropped_rare_text", counters)
+        self.assertEqual(2, text_report.counters["nodes.dropped_rare_text"])
+        self.assertEqual(3, text_report.counters["edges.dropped_rare_text"])
+        self.assertEqual(3, report["parameters"]["max_degree"])
+
+    def test_chunks(self) -> None:
+        """Test that reading in chunks smaller than the file gives the same result."""
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = Path(directory).joinpath("pairs.tsv")
+            input_path.write_text("".join(f"{s}\t{t}\n" for s, t in PAIRS))
+            expected_path = Path(directory).joinpath("expected.tsv")
+            output_path = Path(directory).joinpath("pruned.tsv")
+
+            table = DegreeTable.from_pairs(input_path, chunk_size=3)
+            self.assertEqual(7, len(table))
+            self.assertEqual(4, table["hgnc:1"])
+            self.assertEqual(2, table["text:seen twice"])
+            self.assertEqual(0, table["hgnc:6"])
+
+            kwargs: dict[str, Any] = {"min_degree": 2, "max_degree": 3}
+            expected = prune_pairs(input_path, expected_path, **kwargs)
+            report = prune_pairs(input_path, output_path, chunk_size=3, **kwargs)
+            self.assertEqual(expected_path.read_text(), output_path.read_text())
+        self.assertEqual(expected.counters, report.counters)
@@ -0,0 +1,56 @@
+"""Tests for the compiled db_refs resolver."""
+
+import pickle
+import unittest
+
+import bioregistry
+
+from biosynonyms.resolver import DbRefsResolver
+
+#: A sample of INDRA namespaces, in priority order
+NAMESPACES = ["FPLX", "HGNC", "UP", "CHEBI", "GO", "MESH", "HMDB", "PUBCHEM"]
+
+
+class TestResolver(unittest.TestCase):
+    """Test the compiled db_refs resolver."""
+
+    def test_matches_bioregistry(self) -> None:
+        """Test the resolver gives the same results as the Bioregistry."""
+        resolver = DbRefsResolver(NAMESPACES, max_cache_size=3)
+        pairs = [
+            ("HGNC", "6407"),
+            ("HGNC", "HGNC:6407"),
+            ("CHEBI", "CHEBI:15377"),
+            ("CHEBI", "chebi_15377"),
+            ("CHEBI", "15377"),
+            ("GO", "GO:0006915"),
+            ("MESH", "D000001"),
+            ("UP", "P04637"),
+            ("FPLX", "AKT"),
+            ("PUBCHEM", "2244"),
+            ("HMDB", "HMDB0000001"),
+        ]
+        for _ in range(2):  # second time through uses the cache
+            for namespace, identifier in pairs:
+                with self.subTest(namespace=namespace, identifier=identifier):
+                    self.assertEqual(
+                        bioregistry.normalize_parsed_curie(namespace, identifier, strict=True),
+                        resolver.normalize(namespace, identifier),
+                    )
+        self.assertLessEqual(len(resolver._cache), 3)
+
+    def test_priority(self) -> None:
+        """Test the highest priority namespace is used."""
+        resolver = DbRefsResolver(NAMESPACES)
+        self.assertEqual(
+            ("hgnc", "6407"), resolver.resolve({"TEXT": "KRAS", "UP": "P01116", "HGNC": "6407"})
+        )
+        self.assertIsNone(resolver.resolve({"TEXT": "KRAS"}))
+
+    def test_pickle(self) -> None:
+        """Test the resolver can be pickled without its cache."""
+        resolver = DbRefsResolver(NAMESPACES)
+        resolver.normalize("HGNC", "6407")
+        reloaded = pickle.loads(pickle.dumps(resolver))  # noqa:S301
+        self.assertEqual({}, reloaded._cache)
+        self.assertEqual(("hgnc", "6407"), reloaded.normalize("HGNC", "6407"))
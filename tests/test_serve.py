@@ -0,0 +1,160 @@
+"""Tests for the micro-batching grounding server."""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import biosynonyms
+from biosynonyms.serve import MAX_LINE_BYTES, MicroBatcher, start_server
+
+
+def _echo(texts: Sequence[str]) -> list[list[dict[str, Any]]]:
+    return [[{"text": text}] for text in texts]
+
+
+class TestServe(unittest.TestCase):
+    """Test the grounding server with a local client."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Load the grounder once."""
+        cls.grounder = biosynonyms.make_grounder()
+
+    def test_batching(self) -> None:
+        """Test concurrent requests are batched and answered."""
+
+        async def _main() -> tuple[list[dict], dict]:
+            batcher = MicroBatcher.from_grounder(self.grounder, max_wait=0.05)
+            server = await start_server(batcher, port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                texts = ["YAL021C", "YAL021C", "nothing", "YDL160C"]
+                for i, text in enumerate(texts):
+                    writer.write(json.dumps({"id": i, "text": text}).encode() + b"\n")
+                writer.write(b"not json\n")
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in range(len(texts) + 1)]
+
+                writer.write(b'{"stats": true}\n')
+                await writer.drain()
+                stats = json.loads(await reader.readline())
+                writer.close()
+                await writer.wait_closed()
+            finally:
+                server.close()
+                await server.wait_closed()
+                await batcher.stop()
+            return responses, stats
+
+        responses, stats = asyncio.run(_main())
+        self.assertIn({"error": "invalid JSON"}, responses)
+        id_to_matches = {r["id"]: r["matches"] for r in responses if "id" in r}
+        self.assertEqual(
+            ["sgd:S000000019", "sgd:S000000019", None, "sgd:S000002319"],
+            [
+                ":".join(id_to_matches[i][0]["reference"][k] for k in ("prefix", "identifier"))
+                if id_to_matches[i]
+                else None
+                for i in range(4)
+            ],
+        )
+        self.assertEqual(4, stats["requests"])
+        # all requests were written at once, so they should fit in a single batch
+        self.assertEqual(1, stats["batches"])
+        self.assertEqual(4, sum(stats["latency_ms"].values()))
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """Test the batcher and server with a stub batch function."""
+
+    def test_backpressure(self) -> None:
+        """Test that a connection can't have more than the maximum requests in flight."""
+        batch_sizes: list[int] = []
+
+        def _slow_echo(texts: Sequence[str]) -> list[list[dict[str, Any]]]:
+            batch_sizes.append(len(texts))
+            time.sleep(0.02)
+            return _echo(texts)
+
+        async def _main() -> list[dict[str, Any]]:
+            batcher = MicroBatcher(_slow_echo, ThreadPoolExecutor(1), max_wait=0.01)
+            server = await start_server(batcher, port=0, max_pending=2)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.writelines(f'{{"id": {i}, "text": "{i}"}}\n'.encode() for i in range(6))
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in range(6)]
+                writer.close()
+                await writer.wait_closed()
+            finally:
+                server.close()
+                await server.wait_closed()
+                await batcher.stop()
+            return responses
+
+        responses = asyncio.run(_main())
+        self.assertEqual(set(range(6)), {response["id"] for response in responses})
+        self.assertEqual(6, sum(batch_sizes))
+        self.assertLessEqual(max(batch_sizes), 2)
+
+    def test_long_line(self) -> None:
+        """Test that a line over the limit gets an error, after in-flight requests."""
+
+        async def _main() -> tuple[list[dict[str, Any]], bytes]:
+            batcher = MicroBatcher(_echo, ThreadPoolExecutor(1))
+            server = await start_server(batcher, port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(b'{"id": 1, "text": "a"}\n')
+                writer.write(b"x" * (MAX_LINE_BYTES + 1) + b"\n")
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in range(2)]
+                rest = await reader.read()
+                writer.close()
+                await writer.wait_closed()
+            finally:
+                server.close()
+                await server.wait_closed()
+                await batcher.stop()
+            return responses, rest
+
+        responses, rest = asyncio.run(_main())
+        self.assertEqual({"id": 1, "matches": [{"text": "a"}]}, responses[0])
+        self.assertIn("error", responses[1])
+        # the connection was closed
+        self.assertEqual(b"", rest)
+
+    def test_stop(self) -> None:
+        """Test that stopping fails requests that are waiting, but finishes in-flight ones."""
+        event = threading.Event()
+
+        def _blocking_echo(texts: Sequence[str]) -> list[list[dict[str, Any]]]:
+            event.wait(5)
+            return _echo(texts)
+
+        async def _main() -> list[Any]:
+            batcher = MicroBatcher(_blocking_echo, ThreadPoolExecutor(1), max_batch_size=1)
+            batcher.start()
+            # the first is dispatched, the second waits for it in the batching
+            # loop, and the third is still in the queue
+            tasks = [asyncio.create_task(batcher.ground(text)) for text in "abc"]
+            await asyncio.sleep(0.05)
+            stop_task = asyncio.create_task(batcher.stop())
+            await asyncio.sleep(0.05)
+            event.set()
+            await stop_task
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        first, *rest = asyncio.run(_main())
+        self.assertEqual([{"text": "a"}], first)
+        self.assertEqual(2, len(rest))
+        for result in rest:
+            self.assertIsInstance(result, RuntimeError)
@@ -0,0 +1,29 @@
+"""Tests for process pools whose workers hold an object."""
+
+import unittest
+
+from biosynonyms.workers import call_in_worker, get_process_pool
+
+
+def _make_offset() -> int:
+    return 10
+
+
+def _add(offset: int, value: int, *, scale: int = 1) -> int:
+    return offset + value * scale
+
+
+class TestWorkers(unittest.TestCase):
+    """Test process pools whose workers hold an object."""
+
+    def test_object(self) -> None:
+        """Test sending an object to each worker."""
+        with get_process_pool(2, 5) as executor:
+            results = list(executor.map(call_in_worker(_add, scale=2), range(4)))
+        self.assertEqual([5, 7, 9, 11], results)
+
+    def test_factory(self) -> None:
+        """Test building the object in each worker."""
+        with get_process_pool(2, factory=_make_offset) as executor:
+            results = list(executor.map(call_in_worker(_add), range(4)))
+        self.assertEqual([10, 11, 12, 13], results)